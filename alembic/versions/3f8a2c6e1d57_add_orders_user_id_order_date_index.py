@@ -0,0 +1,28 @@
+"""Add orders (user_id, order_date) index
+
+Revision ID: 3f8a2c6e1d57
+Revises: b7e3d1a9c4f2
+Create Date: 2026-10-19 11:02:17.284930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a2c6e1d57'
+down_revision: Union[str, None] = 'b7e3d1a9c4f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_orders_user_id_order_date", "orders", ["user_id", "order_date"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_orders_user_id_order_date", table_name="orders")
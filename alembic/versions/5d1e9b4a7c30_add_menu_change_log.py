@@ -0,0 +1,39 @@
+"""Add menu change log
+
+Revision ID: 5d1e9b4a7c30
+Revises: 3f8a2c6e1d57
+Create Date: 2026-10-19 11:48:05.613472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e9b4a7c30'
+down_revision: Union[str, None] = '3f8a2c6e1d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "menu_change",
+        sa.Column("version", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("created_date", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("version"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_menu_change_version", "menu_change", ["version"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_menu_change_version", table_name="menu_change")
+    op.drop_table("menu_change")
@@ -0,0 +1,34 @@
+"""Add cart created_date
+
+Revision ID: 8a4c0f2b6e91
+Revises: 5d1e9b4a7c30
+Create Date: 2026-10-19 12:34:50.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4c0f2b6e91'
+down_revision: Union[str, None] = '5d1e9b4a7c30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app creates missing tables with create_all, so the column may already exist
+    if "created_date" not in [column["name"] for column in sa.inspect(op.get_bind()).get_columns("cart")]:
+        op.add_column("cart", sa.Column("created_date", sa.DateTime(), nullable=True))
+    # Existing cart lines start their TTL now
+    op.execute("UPDATE cart SET created_date = CURRENT_TIMESTAMP WHERE created_date IS NULL")
+    op.create_index("ix_cart_created_date", "cart", ["created_date"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cart_created_date", table_name="cart")
+    op.drop_column("cart", "created_date")
@@ -0,0 +1,145 @@
+"""Partition orders and order_item by month
+
+Revision ID: b7e3d1a9c4f2
+Revises: 9c2b595d7301
+Create Date: 2026-10-19 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from data.partitions import PARTITIONED_TABLES, create_month_partition, months_between, next_month
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d1a9c4f2'
+down_revision: Union[str, None] = '9c2b595d7301'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ORDERS_COLUMNS = "order_no, user_id, status, order_date, total_price"
+ORDER_ITEM_COLUMNS = "id, order_no, food_id, food_name, quantity, order_date"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    # order_item carries its order's date so both tables share the same partition key
+    if "order_date" not in [column["name"] for column in inspector.get_columns("order_item")]:
+        op.add_column("order_item", sa.Column("order_date", sa.DateTime(), nullable=True))
+    op.execute("UPDATE order_item SET order_date = (SELECT orders.order_date FROM orders "
+               "WHERE orders.order_no = order_item.order_no) WHERE order_date IS NULL")
+
+    if conn.dialect.name != "postgresql":
+        if "ix_orders_order_date" not in [index["name"] for index in inspector.get_indexes("orders")]:
+            op.create_index("ix_orders_order_date", "orders", ["order_date"])
+        return
+
+    # Postgres: rebuild both tables as monthly range partitioned tables.
+    # The partition key must be part of every unique constraint, hence the composite keys.
+    op.execute("ALTER TABLE order_item RENAME TO order_item_unpartitioned")
+    op.execute("ALTER TABLE orders RENAME TO orders_unpartitioned")
+    op.execute("ALTER SEQUENCE IF EXISTS order_item_id_seq RENAME TO order_item_unpartitioned_id_seq")
+    op.execute("ALTER SEQUENCE IF EXISTS orders_order_no_seq RENAME TO orders_unpartitioned_order_no_seq")
+
+    op.execute("""
+        CREATE TABLE orders (
+            order_no SERIAL,
+            user_id INTEGER NOT NULL REFERENCES users (user_id),
+            status VARCHAR,
+            order_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            total_price DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (order_no, order_date)
+        ) PARTITION BY RANGE (order_date)
+    """)
+    op.execute("""
+        CREATE TABLE order_item (
+            id SERIAL,
+            order_no INTEGER NOT NULL,
+            food_id INTEGER NOT NULL REFERENCES food_menu (food_id) ON DELETE CASCADE,
+            food_name VARCHAR NOT NULL,
+            quantity INTEGER NOT NULL,
+            order_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, order_date),
+            FOREIGN KEY (order_no, order_date) REFERENCES orders (order_no, order_date)
+        ) PARTITION BY RANGE (order_date)
+    """)
+
+    # One partition per month from the oldest order up to two months ahead,
+    # plus a default partition so inserts never fail if a month is missing
+    first_order = conn.execute(sa.text("SELECT MIN(order_date) FROM orders_unpartitioned")).scalar()
+    last_month = next_month(next_month(datetime.now()))
+    for month in months_between(first_order or datetime.now(), last_month):
+        for table in PARTITIONED_TABLES:
+            create_month_partition(conn, table, month)
+    for table in PARTITIONED_TABLES:
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    op.execute(f"INSERT INTO orders ({ORDERS_COLUMNS}) "
+               f"SELECT order_no, user_id, status, COALESCE(order_date, now()), total_price FROM orders_unpartitioned")
+    op.execute(f"INSERT INTO order_item ({ORDER_ITEM_COLUMNS}) "
+               f"SELECT id, order_no, food_id, food_name, quantity, COALESCE(order_date, now()) "
+               f"FROM order_item_unpartitioned")
+    op.execute("SELECT setval('orders_order_no_seq', COALESCE((SELECT MAX(order_no) FROM orders), 0) + 1, false)")
+    op.execute("SELECT setval('order_item_id_seq', COALESCE((SELECT MAX(id) FROM order_item), 0) + 1, false)")
+
+    op.execute("DROP TABLE order_item_unpartitioned")
+    op.execute("DROP TABLE orders_unpartitioned")
+    op.create_index("ix_orders_order_date", "orders", ["order_date"])
+    op.create_index("ix_orders_order_no", "orders", ["order_no"])
+    op.create_index("ix_order_item_id", "order_item", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+
+    if conn.dialect.name == "postgresql":
+        op.execute("ALTER TABLE order_item RENAME TO order_item_partitioned")
+        op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+        op.execute("ALTER SEQUENCE order_item_id_seq RENAME TO order_item_partitioned_id_seq")
+        op.execute("ALTER SEQUENCE orders_order_no_seq RENAME TO orders_partitioned_order_no_seq")
+        op.execute("ALTER INDEX ix_orders_order_date RENAME TO ix_orders_partitioned_order_date")
+        op.execute("ALTER INDEX ix_orders_order_no RENAME TO ix_orders_partitioned_order_no")
+        op.execute("ALTER INDEX ix_order_item_id RENAME TO ix_order_item_partitioned_id")
+
+        op.execute("""
+            CREATE TABLE orders (
+                order_no SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users (user_id),
+                status VARCHAR,
+                order_date TIMESTAMP WITHOUT TIME ZONE,
+                total_price DOUBLE PRECISION NOT NULL
+            )
+        """)
+        op.execute("""
+            CREATE TABLE order_item (
+                id SERIAL PRIMARY KEY,
+                order_no INTEGER NOT NULL REFERENCES orders (order_no),
+                food_id INTEGER NOT NULL REFERENCES food_menu (food_id) ON DELETE CASCADE,
+                food_name VARCHAR NOT NULL,
+                quantity INTEGER NOT NULL,
+                order_date TIMESTAMP WITHOUT TIME ZONE
+            )
+        """)
+        op.execute(f"INSERT INTO orders ({ORDERS_COLUMNS}) SELECT {ORDERS_COLUMNS} FROM orders_partitioned")
+        op.execute(f"INSERT INTO order_item ({ORDER_ITEM_COLUMNS}) "
+                   f"SELECT {ORDER_ITEM_COLUMNS} FROM order_item_partitioned")
+        op.execute("SELECT setval('orders_order_no_seq', COALESCE((SELECT MAX(order_no) FROM orders), 0) + 1, false)")
+        op.execute("SELECT setval('order_item_id_seq', COALESCE((SELECT MAX(id) FROM order_item), 0) + 1, false)")
+
+        # Dropping the parents drops every partition with them
+        op.execute("DROP TABLE order_item_partitioned")
+        op.execute("DROP TABLE orders_partitioned")
+        op.create_index("ix_orders_order_no", "orders", ["order_no"])
+        op.create_index("ix_order_item_id", "order_item", ["id"])
+    else:
+        op.drop_index("ix_orders_order_date", table_name="orders")
+
+    op.drop_column("order_item", "order_date")
@@ -0,0 +1,39 @@
+"""Add kitchen batching columns
+
+Revision ID: c4e7a2d9f813
+Revises: 8a4c0f2b6e91
+Create Date: 2026-10-19 15:12:07.481936
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a2d9f813'
+down_revision: Union[str, None] = '8a4c0f2b6e91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The app creates missing tables with create_all, so the columns may already exist
+    inspector = sa.inspect(op.get_bind())
+    if "prep_minutes" not in [column["name"] for column in inspector.get_columns("food_menu")]:
+        op.add_column("food_menu", sa.Column("prep_minutes", sa.Integer(), nullable=False, server_default="10"))
+    if "status" not in [column["name"] for column in inspector.get_columns("order_item")]:
+        op.add_column("order_item", sa.Column("status", sa.String(), nullable=True))
+    # Everything ordered before the kitchen queue existed has already been served
+    op.execute("UPDATE order_item SET status = 'Done' WHERE status IS NULL")
+    op.create_index("ix_order_item_pending", "order_item", ["food_id"], if_not_exists=True,
+                    postgresql_where=sa.text("status = 'Pending'"), sqlite_where=sa.text("status = 'Pending'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_order_item_pending", table_name="order_item")
+    op.drop_column("order_item", "status")
+    op.drop_column("food_menu", "prep_minutes")
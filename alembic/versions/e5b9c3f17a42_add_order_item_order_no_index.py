@@ -0,0 +1,30 @@
+"""Add order_item (order_no, order_date) index
+
+Revision ID: e5b9c3f17a42
+Revises: c4e7a2d9f813
+Create Date: 2026-10-19 15:41:26.307518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c3f17a42'
+down_revision: Union[str, None] = 'c4e7a2d9f813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Items are loaded per order (/me/orders, reports). On Postgres the index is created on the
+    # partitioned parent, which creates it on every month partition (and future ones).
+    op.create_index("ix_order_item_order_no_order_date", "order_item", ["order_no", "order_date"],
+                    if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_order_item_order_no_order_date", table_name="order_item")
@@ -31,6 +31,25 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# Function to read the token payload from an Authorization header without touching the database
+def decode_access_token(authorization: str | None):
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
+# Function to verify JWT and return its payload without a database session
+# (for long-lived requests like streams, which would otherwise hold a connection open)
+def get_token_payload(credentials: HTTPAuthorizationCredentials = Security(security)):
+    payload = decode_access_token(f"Bearer {credentials.credentials}")
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid credentials", headers={"WWW-Authenticate": "Bearer"})
+    return payload
+
+
 # Function to verify JWT and get user
 def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
     token = credentials.credentials  # Extract Bearer token
@@ -0,0 +1,98 @@
+"""Compare loading full ORM entities with column-only rows on the read endpoints.
+
+Builds the same responses as GET /menu/All and GET /feedbacks from a large menu and
+feedback table, once from ORM entities (identity map, instance state) and once from
+plain rows selected column by column, and reports latency and peak Python memory.
+
+Usage:
+    python -m benchmarks.column_loading --items 20000 --feedback 100000 --repeat 10
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Use a throwaway SQLite database unless one is configured explicitly
+BENCH_DIR = tempfile.mkdtemp(prefix="column_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DIR}/bench.db")
+
+from data.database import SessionLocal  # noqa: E402
+from data.model.models import Feedback, FoodMenu, User  # noqa: E402
+from data.curd import get_menu_rows, FEEDBACK_COLUMNS  # noqa: E402
+from benchmarks.menu_snapshot import seed_menu, menu_response  # noqa: E402
+
+
+def seed_feedback(rows: int):
+    with SessionLocal() as db:
+        db.query(Feedback).delete()
+        if not db.query(User).filter(User.user_id == 1).first():
+            db.add(User(user_id=1, fullname="Bench User", user_name="bench", email="bench@example.com",
+                        password="x", phone_no="0000000000"))
+        created = datetime.now(timezone.utc)
+        db.bulk_insert_mappings(Feedback, [{
+            "user_id": 1,
+            "name": "Bench User",
+            "message": f"feedback number {index} " * 3,
+            "created_date": created,
+            "rating": index % 5 + 1
+        } for index in range(rows)])
+        db.commit()
+
+
+def feedback_response(feedback):
+    return {
+        "id": feedback.id,
+        "user_id": feedback.user_id,
+        "name": feedback.name,
+        "message": feedback.message,
+        "created_date": feedback.created_date,
+        "rating": feedback.rating
+    }
+
+
+CASES = {
+    "menu entities": lambda db: [menu_response(food) for food in db.query(FoodMenu).all()],
+    "menu columns": lambda db: [menu_response(food) for food in get_menu_rows(db)],
+    "feedback entities": lambda db: [feedback_response(feedback) for feedback in db.query(Feedback).all()],
+    "feedback columns": lambda db: [row._asdict() for row in db.query(*FEEDBACK_COLUMNS)],
+}
+
+
+# Function to time one case (fresh session per request, like the endpoints) and measure its peak memory
+def measure(build, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            build(db)
+            timings.append(time.perf_counter() - start)
+
+    with SessionLocal() as db:
+        tracemalloc.start()
+        build(db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ORM entity loading against column-only rows")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--feedback", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    seed_menu(args.items)
+    seed_feedback(args.feedback)
+
+    print(f"{args.items} menu items, {args.feedback} feedback rows, median of {args.repeat} runs")
+    for name, build in CASES.items():
+        median_ms, peak_mib = measure(build, args.repeat)
+        print(f"{name:>18}: {median_ms:8.1f} ms, peak {peak_mib:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
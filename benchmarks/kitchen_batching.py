@@ -0,0 +1,109 @@
+"""Simulate a kitchen cooking queued order items one by one (FIFO) or in batches.
+
+Orders arrive at random (Poisson) with Zipf-like dish popularity. A number of
+stations cook: whenever one is free it takes the next order line (FIFO), or the
+first batch of data/kitchen.plan_batches over everything pending (batched).
+Cooking n portions together takes prep_minutes * (1 + extra * (n - 1)): one oven
+load or pan of food is only slightly slower than a single portion.
+
+Usage:
+    python -m benchmarks.kitchen_batching --orders-per-minute 1 --minutes 240 --stations 16
+"""
+import argparse
+import heapq
+import os
+import random
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+
+# data.kitchen imports the models, which need a database URL (nothing is written to it)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='kitchen_bench_')}/bench.db")
+
+from data.kitchen import KitchenItem, plan_batches  # noqa: E402
+
+START = datetime(2026, 1, 1, 18, 0)
+
+
+def generate_orders(rng, orders_per_minute: float, minutes: float, dishes: int):
+    prep_minutes = [rng.choice([6, 8, 10, 12, 15, 20]) for _ in range(dishes)]
+    weights = [1 / (rank + 1) for rank in range(dishes)]
+    items, order_no, now = [], 0, 0.0
+    while True:
+        now += rng.expovariate(orders_per_minute)
+        if now > minutes:
+            return items
+        order_no += 1
+        ordered_at = START + timedelta(minutes=now)
+        for food_id in set(rng.choices(range(dishes), weights, k=rng.choice([1, 1, 2, 2, 3]))):
+            items.append(KitchenItem(len(items) + 1, order_no, food_id, f"dish {food_id}",
+                                     rng.choice([1, 1, 1, 2]), prep_minutes[food_id], ordered_at))
+
+
+def cook_minutes(prep_minutes: float, portions: int, extra: float):
+    return prep_minutes * (1 + extra * (portions - 1))
+
+
+# Function to run the kitchen and return when each order was ready
+def simulate(items, stations: int, extra: float, batched: bool, window: float, max_batch: int, promise: float):
+    arrivals = sorted(items, key=lambda item: (item.ordered_at, item.id))
+    free_at = [START] * stations
+    heapq.heapify(free_at)
+    pending, next_arrival, ready = [], 0, {}
+
+    while next_arrival < len(arrivals) or pending:
+        now = heapq.heappop(free_at)
+        # Idle station: wait for the next order
+        if not pending and arrivals[next_arrival].ordered_at > now:
+            now = arrivals[next_arrival].ordered_at
+        while next_arrival < len(arrivals) and arrivals[next_arrival].ordered_at <= now:
+            pending.append(arrivals[next_arrival])
+            next_arrival += 1
+
+        if batched:
+            cooked = plan_batches(pending, window, max_batch, promise)[0].items
+            cooked_ids = {item.id for item in cooked}
+            pending = [item for item in pending if item.id not in cooked_ids]
+        else:
+            cooked = [pending.pop(0)]
+
+        done = now + timedelta(minutes=cook_minutes(cooked[0].prep_minutes, sum(item.quantity for item in cooked),
+                                                    extra))
+        for item in cooked:
+            ready[item.order_no] = max(ready.get(item.order_no, done), done)
+        heapq.heappush(free_at, done)
+    return ready
+
+
+def report(name: str, items, ready, promise: float):
+    ordered_at = {item.order_no: item.ordered_at for item in items}
+    waits = sorted((ready[order_no] - ordered_at[order_no]).total_seconds() / 60 for order_no in ready)
+    makespan = (max(ready.values()) - START).total_seconds() / 3600
+    portions = sum(item.quantity for item in items)
+    late = sum(wait > promise for wait in waits) / len(waits) * 100
+    print(f"{name:>8}: {portions / makespan:7.1f} portions/hour, order wait mean {statistics.mean(waits):6.1f} min, "
+          f"p95 {waits[int(len(waits) * 0.95)]:6.1f} min, late {late:5.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FIFO cooking with batched cooking")
+    parser.add_argument("--orders-per-minute", type=float, default=1.0)
+    parser.add_argument("--minutes", type=float, default=240)
+    parser.add_argument("--dishes", type=int, default=30)
+    parser.add_argument("--stations", type=int, default=16)
+    parser.add_argument("--extra", type=float, default=0.15, help="cost of each extra portion in a batch")
+    parser.add_argument("--window", type=float, default=5.0, help="batching window in minutes")
+    parser.add_argument("--max-batch", type=int, default=10)
+    parser.add_argument("--promise", type=float, default=30.0, help="promised minutes per order")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    items = generate_orders(random.Random(args.seed), args.orders_per_minute, args.minutes, args.dishes)
+    print(f"{len({item.order_no for item in items})} orders, {len(items)} order lines, {args.stations} stations")
+    for name, batched in (("fifo", False), ("batched", True)):
+        ready = simulate(items, args.stations, args.extra, batched, args.window, args.max_batch, args.promise)
+        report(name, items, ready, args.promise)
+
+
+if __name__ == "__main__":
+    main()
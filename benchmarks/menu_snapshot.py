@@ -0,0 +1,128 @@
+"""Compare per-worker menu caching with the shared memory-mapped menu snapshot.
+
+Starts several worker processes (like gunicorn workers) that each serve the full menu
+many times, either rendering it from their own in-process cache or sending the JSON
+already rendered in the shared snapshot file, and reports memory (PSS, which splits
+shared pages between processes) and latency.
+
+Usage:
+    python -m benchmarks.menu_snapshot --items 5000 --workers 4 --requests 200
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+# Use a throwaway SQLite database unless one is configured explicitly
+BENCH_DIR = tempfile.mkdtemp(prefix="menu_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DIR}/bench.db")
+
+from data.database import Base, engine, SessionLocal  # noqa: E402
+from data.model.models import Category, FoodMenu  # noqa: E402
+from data.menu_snapshot import MenuSnapshotReader, render_json, write_menu_snapshot  # noqa: E402
+
+
+def seed_menu(items: int):
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.query(FoodMenu).delete()
+        db.query(Category).delete()
+        categories = [Category(category_id=index + 1, name=f"category {index}", image_url=f"category/{index}.jpg")
+                      for index in range(20)]
+        db.add_all(categories)
+        db.bulk_insert_mappings(FoodMenu, [{
+            "food_id": index + 1,
+            "food_name": f"food {index}",
+            "description": f"description of food {index} " * 4,
+            "quantity": 100,
+            "category_id": index % 20 + 1,
+            "category_name": f"category {index % 20}",
+            "is_active": "Yes",
+            "price": 5 + index % 30,
+            "food_image_url": f"menu/food_{index}.jpg"
+        } for index in range(items)])
+        db.commit()
+
+
+def menu_response(food):
+    return {
+        "food_id": food.food_id,
+        "food_name": food.food_name,
+        "quantity": food.quantity,
+        "description": food.description,
+        "category_id": food.category_id,
+        "category_name": food.category_name,
+        "price": food.price,
+        "food_image_url": f"http://localhost:8000/{food.food_image_url}"
+    }
+
+
+# Function to read this process's proportional set size in KiB
+def pss_kib():
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(mode: str, snapshot_path: str, requests: int, results):
+    if mode == "cache":
+        # Per-worker cache: every worker holds its own copy of the menu rows
+        with SessionLocal() as db:
+            cache = db.query(FoodMenu).all()
+            db.expunge_all()
+        render_menu = lambda: render_json([menu_response(food) for food in cache]).encode()  # noqa: E731
+    else:
+        reader = MenuSnapshotReader(snapshot_path)
+        render_menu = lambda: bytes(reader.menu_json())  # noqa: E731
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        render_menu()
+        timings.append(time.perf_counter() - start)
+    results.put((pss_kib(), timings))
+
+
+def run(mode: str, snapshot_path: str, workers: int, requests: int):
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(mode, snapshot_path, requests, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    timings = sorted(timing for _, worker_timings in samples for timing in worker_timings)
+    return {
+        "total_pss_mib": sum(pss for pss, _ in samples) / 1024,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p95_ms": timings[int(len(timings) * 0.95)] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark menu snapshot against per-worker caching")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    seed_menu(args.items)
+    snapshot_path = os.path.join(BENCH_DIR, "menu.bin")
+    with SessionLocal() as db:
+        write_menu_snapshot(db, snapshot_path)
+
+    print(f"{args.items} menu items, {args.workers} workers, {args.requests} menu requests per worker")
+    for mode in ("cache", "snapshot"):
+        result = run(mode, snapshot_path, args.workers, args.requests)
+        print(f"{mode:>8}: total PSS {result['total_pss_mib']:.1f} MiB, "
+              f"mean {result['mean_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
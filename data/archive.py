@@ -0,0 +1,101 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from data.model.models import Orders, OrderItem
+from data.invalidation import invalidation_bus
+from data.partitions import is_partitioned, drop_month_partitions, months_between, next_month
+
+# Load environment variables
+load_dotenv()
+
+# Closed months of orders are exported here as gzip compressed JSONL files
+ORDER_ARCHIVE_DIR = os.getenv("ORDER_ARCHIVE_DIR", "archive/orders")
+
+
+def archive_path(month):
+    return os.path.join(ORDER_ARCHIVE_DIR, f"orders_{month.year}_{month.month:02d}.jsonl.gz")
+
+
+# Function to export one month of orders (with their items) and remove it from the database
+def archive_month(db: Session, month, keep_detached: bool = False):
+    start, end = datetime(month.year, month.month, 1), datetime.combine(next_month(month), datetime.min.time())
+    orders = db.query(Orders).filter(Orders.order_date >= start, Orders.order_date < end) \
+        .order_by(Orders.order_no).yield_per(1000)
+    if not db.query(orders.exists()).scalar():
+        return 0
+    items = get_order_items_by_date(db, start, end)
+
+    os.makedirs(ORDER_ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(month)
+    count = 0
+    # Write to a temporary file first so a crash never leaves a half written archive
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8") as archive:
+        # Keep anything archived by an earlier run for the same month
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as previous:
+                archive.writelines(previous)
+        for order in orders:
+            archive.write(json.dumps({
+                "order_no": order.order_no,
+                "user_id": order.user_id,
+                "status": order.status,
+                "order_date": order.order_date.isoformat(),
+                "total_price": order.total_price,
+                "items": items.get(order.order_no, [])
+            }) + "\n")
+            count += 1
+    os.replace(path + ".tmp", path)
+
+    conn = db.connection()
+    if is_partitioned(conn, "orders"):
+        drop_month_partitions(conn, month, keep_detached)
+        # Orders placed while the month had no partition are in the default partitions
+        db.query(OrderItem).filter(OrderItem.order_date >= start, OrderItem.order_date < end) \
+            .delete(synchronize_session=False)
+        db.query(Orders).filter(Orders.order_date >= start, Orders.order_date < end).delete(synchronize_session=False)
+    else:
+        db.query(OrderItem).filter(OrderItem.order_no.in_(
+            db.query(Orders.order_no).filter(Orders.order_date >= start, Orders.order_date < end)
+        )).delete(synchronize_session=False)
+        db.query(Orders).filter(Orders.order_date >= start, Orders.order_date < end).delete(synchronize_session=False)
+    db.commit()
+    # Cached order reports of this month still hold the removed orders
+    invalidation_bus.publish(db, "orders_archive", None, month=month.isoformat())
+    return count
+
+
+# Function to collect the items of every order in a date range, keyed by order_no
+def get_order_items_by_date(db: Session, start, end):
+    items = {}
+    rows = db.query(OrderItem.order_no, OrderItem.food_id, OrderItem.food_name, OrderItem.quantity) \
+        .join(Orders).filter(Orders.order_date >= start, Orders.order_date < end)
+    for row in rows:
+        items.setdefault(row.order_no, []).append({
+            "food_id": row.food_id,
+            "food_name": row.food_name,
+            "quantity": row.quantity
+        })
+    return items
+
+
+# Function to read archived orders in a date range as (order_date, order) pairs, orders shaped like get_orders_by_date
+def read_archived_orders(start_date, end_date):
+    archived_orders = {}
+    for month in months_between(start_date, end_date):
+        path = archive_path(month)
+        if not os.path.exists(path):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                order = json.loads(line)
+                order_date = datetime.fromisoformat(order["order_date"]).replace(tzinfo=None)
+                if start_date <= order_date <= end_date:
+                    archived_orders[order["order_no"]] = (order_date, {
+                        "order_no": order["order_no"],
+                        "total_price": order["total_price"],
+                        "items": order["items"]
+                    })
+    return list(archived_orders.values())
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from sqlalchemy import func
+from data.database import SessionLocal
+from data.model.models import Cart
+
+# Load environment variables
+load_dotenv()
+
+# A cart is abandoned when its newest line is older than this
+CART_TTL_HOURS = float(os.getenv("CART_TTL_HOURS", "48"))
+CART_SWEEP_INTERVAL_SECONDS = float(os.getenv("CART_SWEEP_INTERVAL_SECONDS", "600"))
+# Rows deleted per transaction, small enough to keep locks short
+CART_SWEEP_BATCH_SIZE = int(os.getenv("CART_SWEEP_BATCH_SIZE", "500"))
+
+logger = logging.getLogger(__name__)
+
+cart_sweeper_metrics = {
+    "runs": 0,
+    "rows_reclaimed": 0,
+    "last_run_rows": 0,
+    "last_run_seconds": 0.0,
+    "last_run_at": None,
+    "errors": 0
+}
+
+
+# Function to delete abandoned carts in bounded batches, returns the number of rows deleted
+def sweep_abandoned_carts(ttl_hours: float = CART_TTL_HOURS, batch_size: int = CART_SWEEP_BATCH_SIZE):
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ttl_hours)
+    deleted = 0
+    with SessionLocal() as db:
+        abandoned_users = db.query(Cart.user_id).group_by(Cart.user_id) \
+            .having(func.max(Cart.created_date) < cutoff).subquery()
+        while True:
+            cart_ids = [cart_id for cart_id, in db.query(Cart.cart_id)
+                        .filter(Cart.user_id.in_(abandoned_users.select()), Cart.created_date < cutoff)
+                        .limit(batch_size)]
+            if not cart_ids:
+                break
+            db.query(Cart).filter(Cart.cart_id.in_(cart_ids)).delete(synchronize_session=False)
+            db.commit()
+            deleted += len(cart_ids)
+    return deleted
+
+
+# Background loop started with the app; runs the sweep in a thread so requests are not blocked
+async def run_cart_sweeper():
+    while True:
+        await asyncio.sleep(CART_SWEEP_INTERVAL_SECONDS)
+        started = time.perf_counter()
+        try:
+            deleted = await asyncio.to_thread(sweep_abandoned_carts)
+        except Exception:
+            cart_sweeper_metrics["errors"] += 1
+            logger.exception("Abandoned cart sweep failed")
+            continue
+        cart_sweeper_metrics["runs"] += 1
+        cart_sweeper_metrics["rows_reclaimed"] += deleted
+        cart_sweeper_metrics["last_run_rows"] = deleted
+        cart_sweeper_metrics["last_run_seconds"] = round(time.perf_counter() - started, 3)
+        cart_sweeper_metrics["last_run_at"] = datetime.now(timezone.utc)
+        if deleted:
+            logger.info("Reclaimed %d abandoned cart rows", deleted)
@@ -1,16 +1,49 @@
-from collections import defaultdict
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, JSON, insert, select, update
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
 from data.schema.schemas import *
 from data.model.models import *
+from data.archive import read_archived_orders
+from data.menu_snapshot import write_menu_snapshot
+from data.recommendations import co_occurrence_index
+from data.group_commit import group_commit_writer, WRITE_MODES
+from data.invalidation import invalidation_bus
+from data.order_events import order_hub, order_event
+from data.report_cache import order_report_cache
 from passlib.context import CryptContext
+from datetime import datetime, timedelta
+from itertools import islice
+import heapq
+import logging
+import os
 
 # Password hashing setup
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # hashed_password = pwd_context.hash("pooja123456")
 # print(hashed_password)
 
+logger = logging.getLogger(__name__)
+
+# Clients further behind than this many menu changes get a full snapshot instead of deltas
+MENU_CHANGES_MAX_DELTA = int(os.getenv("MENU_CHANGES_MAX_DELTA", "500"))
+# Versions are handed out before commit, so a lower version can commit after a higher one is visible.
+# Changes newer than this are sent but not counted as seen, so the next poll reads them (and any late commit) again.
+MENU_CHANGES_SETTLE_SECONDS = float(os.getenv("MENU_CHANGES_SETTLE_SECONDS", "10"))
+
+# Columns the read endpoints return; selecting just these gives lightweight rows instead of ORM entities
+MENU_COLUMNS = (FoodMenu.food_id, FoodMenu.food_name, FoodMenu.quantity, FoodMenu.description, FoodMenu.category_id,
+                FoodMenu.category_name, FoodMenu.price, FoodMenu.food_image_url)
+CATEGORY_COLUMNS = (Category.category_id, Category.name, Category.image_url)
+CART_COLUMNS = (Cart.food_id, Cart.food_name, Cart.quantity, Cart.price, Cart.total_price)
+FEEDBACK_COLUMNS = (Feedback.id, Feedback.user_id, Feedback.name, Feedback.message, Feedback.created_date,
+                    Feedback.rating)
+
+# Durability of POST /feedback, see WRITE_MODES in data/group_commit.py
+FEEDBACK_WRITE_MODE = os.getenv("FEEDBACK_WRITE_MODE", "sync")
+if FEEDBACK_WRITE_MODE not in WRITE_MODES:
+    raise ValueError(f"FEEDBACK_WRITE_MODE must be one of {sorted(WRITE_MODES)}")
+
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -87,7 +120,11 @@ def create_category(db: Session, user_id: int, food_category:CreateCategory):
     )
 
     db.add(category)
+    db.flush()
+    record_menu_change(db, "category", category.category_id, "create")
     db.commit()
+    write_menu_snapshot(db)
+    publish_menu_change(db, "category", category.category_id)
     db.refresh(category)
     return category
 
@@ -99,8 +136,15 @@ def delete_category_by_id(db: Session, category_id: int):
     if not category:
         raise HTTPException(status_code=404, detail="category not found")
 
+    # Food items of the category are deleted with it (cascade)
+    for food in category.food_menus:
+        record_menu_change(db, "food_menu", food.food_id, "delete")
+    record_menu_change(db, "category", category_id, "delete")
     db.delete(category)  # Delete the food entry from the database
     db.commit()
+    write_menu_snapshot(db)
+    # action tells the order report caches that past order items of the category's foods are gone
+    publish_menu_change(db, "category", category_id, action="delete")
 
 
 # Function to Update Category Based On Given Food ID
@@ -112,11 +156,88 @@ def update_category_by_id(db: Session, category_id: int, food_category: UpdateCa
     for key, value in update_category.items():
         setattr(category, key, value)
 
+    record_menu_change(db, "category", category_id, "update")
     db.commit()
+    write_menu_snapshot(db)
+    publish_menu_change(db, "category", category_id)
     db.refresh(category)
     return category
 
 
+# Function to record a menu change in the change log (committed with the caller's transaction)
+def record_menu_change(db: Session, entity: str, entity_id: int, action: str):
+    db.add(MenuChange(entity=entity, entity_id=entity_id, action=action))
+
+
+# Function to tell the other app processes/nodes that the menu changed, so they drop their cached copies.
+# Call it after the commit; entity_id None means many rows changed.
+def publish_menu_change(db: Session, table: str, entity_id: int | None = None, **details):
+    version = db.query(func.max(MenuChange.version)).scalar() or 0
+    invalidation_bus.publish(db, table, entity_id, version, **details)
+
+
+# Function to get menu changes since a version, or a full snapshot if the client is new or too far behind
+def get_menu_changes(db: Session, since: int, max_changes: int = MENU_CHANGES_MAX_DELTA):
+    latest_version = db.query(func.max(MenuChange.version)).scalar() or 0
+    oldest_version = db.query(func.min(MenuChange.version)).scalar() or 0
+    pending = db.query(func.count(MenuChange.version)).filter(MenuChange.version > since).scalar()
+
+    # The version the client may resume from: just before the oldest change that has not settled yet
+    settled_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=MENU_CHANGES_SETTLE_SECONDS)
+    unsettled = db.query(func.min(MenuChange.version)).filter(MenuChange.created_date > settled_before).scalar()
+    version = unsettled - 1 if unsettled is not None else latest_version
+
+    # First sync (rows older than the log are not in it), unknown version (log pruned or database reset)
+    # or too many changes: send everything
+    if since <= 0 or since < oldest_version - 1 or since > latest_version or pending > max_changes:
+        return {
+            "full": True,
+            "version": version,
+            "menu": db.query(FoodMenu).all(),
+            "categories": db.query(Category).all(),
+            "deleted_menu": [],
+            "deleted_categories": []
+        }
+
+    # Only the last change per entity matters: either it still exists (send it) or it was deleted
+    changed = {"food_menu": set(), "category": set()}
+    for entity, entity_id in db.query(MenuChange.entity, MenuChange.entity_id) \
+            .filter(MenuChange.version > since).distinct():
+        changed[entity].add(entity_id)
+
+    menu = db.query(FoodMenu).filter(FoodMenu.food_id.in_(changed["food_menu"])).all() \
+        if changed["food_menu"] else []
+    categories = db.query(Category).filter(Category.category_id.in_(changed["category"])).all() \
+        if changed["category"] else []
+    return {
+        "full": False,
+        "version": max(since, version),
+        "menu": menu,
+        "categories": categories,
+        "deleted_menu": sorted(changed["food_menu"] - {food.food_id for food in menu}),
+        "deleted_categories": sorted(changed["category"] - {category.category_id for category in categories})
+    }
+
+
+# Function to get the menu (optionally one category) as plain rows: only the columns the API returns,
+# without building ORM entities or tracking them in the session
+def get_menu_rows(db: Session, category_name: str | None = None):
+    query = db.query(*MENU_COLUMNS)
+    if category_name is not None:
+        query = query.filter(FoodMenu.category_name == category_name)
+    return query.all()
+
+
+# Function to get all categories as plain rows
+def get_category_rows(db: Session):
+    return db.query(*CATEGORY_COLUMNS).all()
+
+
+# Function to get a user's cart lines as plain rows
+def get_cart_rows(db: Session, user_id: int):
+    return db.query(*CART_COLUMNS).filter(Cart.user_id == user_id).all()
+
+
 # Function to Create Restaurant Food Menu
 def create_food_menu(db: Session, user_id: int, food_menu: CreateFoodMenu):
     if db.query(FoodMenu).filter(FoodMenu.food_name == food_menu.food_name).first():
@@ -131,11 +252,16 @@ def create_food_menu(db: Session, user_id: int, food_menu: CreateFoodMenu):
         is_active=food_menu.is_active,
         price=food_menu.price,
         food_image_url=food_menu.food_image_url,
+        prep_minutes=food_menu.prep_minutes,
         user_id=user_id  # Ensure this is an integer
     )
 
     db.add(menu)
+    db.flush()
+    record_menu_change(db, "food_menu", menu.food_id, "create")
     db.commit()
+    write_menu_snapshot(db)
+    publish_menu_change(db, "food_menu", menu.food_id)
     db.refresh(menu)
     return menu
 
@@ -149,11 +275,43 @@ def update_food_menu_by_id(db: Session, food_id: int, food_menu: FoodMenuUpdate)
     for key, value in update_food.items():
         setattr(food, key, value)
 
+    record_menu_change(db, "food_menu", food_id, "update")
     db.commit()
+    write_menu_snapshot(db)
+    publish_menu_change(db, "food_menu", food_id)
     db.refresh(food)
     return food
 
 
+# Function to Update many Food Menu items (by id list or category) in one set-based UPDATE
+def bulk_update_food_menu(db: Session, bulk_update: BulkFoodMenuUpdate):
+    if (bulk_update.food_ids is None) == (bulk_update.category_id is None):
+        raise HTTPException(status_code=400, detail="Give either food_ids or category_id")
+
+    values = bulk_update.model_dump(exclude_unset=True, exclude={"food_ids", "category_id"})
+    if not values:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+
+    if bulk_update.food_ids is not None:
+        condition = FoodMenu.food_id.in_(bulk_update.food_ids)
+    else:
+        condition = FoodMenu.category_id == bulk_update.category_id
+
+    updated = db.execute(
+        update(FoodMenu).where(condition).values(**values).returning(*MENU_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if updated:
+        db.execute(insert(MenuChange), [
+            {"entity": "food_menu", "entity_id": food.food_id, "action": "update"} for food in updated
+        ])
+    db.commit()
+    write_menu_snapshot(db)  # Rebuilt once for the whole batch
+    publish_menu_change(db, "food_menu")
+    return updated
+
+
 # Function to Delete Restaurant Food Menu Based On Given Food ID
 def delete_food_menu_by_id(db: Session, food_id: int):
     food = db.query(FoodMenu).filter(FoodMenu.food_id == food_id).first()
@@ -161,8 +319,12 @@ def delete_food_menu_by_id(db: Session, food_id: int):
     if not food:
         raise HTTPException(status_code=404, detail="Food not found")
 
-    db.delete(food)  # Delete the food entry from the database
+    record_menu_change(db, "food_menu", food_id, "delete")
+    db.delete(food)  # Delete the food entry from the database (and its order items)
     db.commit()  # Commit the transaction
+    write_menu_snapshot(db)
+    # action tells the order report caches to drop the days those order items were on
+    publish_menu_change(db, "food_menu", food_id, action="delete")
 
 
 # Function to Add Food Item InTo Cart
@@ -194,6 +356,16 @@ def add_to_cart(db: Session, user_id: int, cart_data: AddToCart):
     return cart_item
 
 
+# Function to get a new order number. On Postgres the orders key is (order_no, order_date) since
+# partitioning, so order_no is not unique by itself: take it from the sequence, never max + 1.
+def next_order_no(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return db.execute(select(func.nextval(func.pg_get_serial_sequence("orders", "order_no")))).scalar()
+    # Elsewhere order_no is the primary key, so two concurrent orders cannot both take the same number
+    last_order_no = db.query(func.max(Orders.order_no)).scalar()
+    return (last_order_no or 0) + 1  # Start from 1
+
+
 def place_order(db: Session, user_id: int):
     # Fetch cart items for the user
     cart_items = db.query(Cart).filter(Cart.user_id == user_id).all()
@@ -201,9 +373,7 @@ def place_order(db: Session, user_id: int):
     if not cart_items:
         raise HTTPException(status_code=400, detail="Cart is empty. Cannot place order.")
 
-    # Get the last order number and increment it
-    last_order = db.query(Orders).order_by(Orders.order_no.desc()).first()
-    order_no = last_order.order_no + 1 if last_order else 1  # Start from 1
+    order_no = next_order_no(db)
 
     # Calculate total order price
     total_price = sum(item.total_price for item in cart_items)
@@ -213,7 +383,7 @@ def place_order(db: Session, user_id: int):
         new_order = Orders(
             order_no=order_no,
             user_id=user_id,
-            status="Completed",
+            status="Pending",  # Completed once the kitchen has cooked every item (data/kitchen.py)
             order_date=datetime.now(timezone.utc),
             total_price=total_price
         )
@@ -227,6 +397,7 @@ def place_order(db: Session, user_id: int):
                 food_id=item.food_id,
                 food_name=item.food_name,
                 quantity=item.quantity,
+                order_date=new_order.order_date,
             )
             db.add(order_item)
             # Decrease the food quantity in the menu
@@ -236,50 +407,215 @@ def place_order(db: Session, user_id: int):
                     raise HTTPException(status_code=400, detail=f"Not enough stock for {food_item.food_name}.")
                 food_item.quantity -= item.quantity  # Deduct ordered quantity
                 db.add(food_item)
+                record_menu_change(db, "food_menu", food_item.food_id, "update")
+
+        new_order_event = order_event(new_order, cart_items)
 
         # Delete all cart items for the user
         db.query(Cart).filter(Cart.user_id == user_id).delete()
         db.commit()
 
-        return {"message": "Order placed successfully!", "order_no": order_no, "total_price": total_price}
-
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-
-def get_orders_by_date(db: Session, start_date, end_date):
-    # Fetch orders within the date range
-    orders_data = db.query(
-        Orders.order_no,
-        Orders.total_price,
-        OrderItem.food_id,
-        OrderItem.food_name,
-        OrderItem.quantity
-    ).join(OrderItem).filter(
+    # The order is committed from here on. A failing side effect must not turn it into an error
+    # (the client would retry and get "Cart is empty"), so failures are only logged.
+    food_ids = [item["food_id"] for item in new_order_event["items"]]
+    side_effects = (
+        # Push the order to this process' kitchen/admin streams
+        lambda: order_hub.publish(new_order_event),
+        lambda: co_occurrence_index.add_order(order_no, food_ids),
+        # Every node refreshes its menu snapshot (stock changed, debounced so a burst of orders is one rebuild),
+        # other processes count the order and push it to their streams too
+        lambda: publish_menu_change(db, "food_menu"),
+        lambda: invalidation_bus.publish(db, "orders", order_no, food_ids=food_ids)
+    )
+    for side_effect in side_effects:
+        try:
+            side_effect()
+        except Exception:
+            db.rollback()
+            logger.exception("Post-commit step for order %s failed", order_no)
+
+    return {"message": "Order placed successfully!", "order_no": order_no, "total_price": total_price}
+
+
+# Function to build the per-order JSON array of items in the database
+def order_items_json(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        item = func.json_build_object("food_id", OrderItem.food_id, "food_name", OrderItem.food_name,
+                                      "quantity", OrderItem.quantity)
+        return func.json_agg(item, type_=JSON)
+    item = func.json_object("food_id", OrderItem.food_id, "food_name", OrderItem.food_name,
+                            "quantity", OrderItem.quantity)
+    return func.json_group_array(item, type_=JSON)
+
+
+# Function to get the orders in [start_date, end_date] ordered by order_no as (order_date, order) pairs,
+# grouped in the database; archived months are read back from their JSONL files
+def query_orders(db: Session, start_date, end_date, include_archived: bool = False,
+                 limit: int | None = None, cursor: int | None = None):
+    # The page of orders first (keyset on order_no), so the database only ever touches one page
+    page = db.query(Orders.order_no, Orders.order_date, Orders.total_price).filter(
         Orders.order_date >= start_date,
         Orders.order_date <= end_date
-    ).all()
-
-    # Group orders by order_no
-    grouped_orders = defaultdict(lambda: {"order_no": None, "total_price": 0, "items": []})
-
-    for order in orders_data:
-        order_no = order.order_no
-        total_price = order.total_price
-        food_id = order.food_id
-        food_name = order.food_name
-        quantity = order.quantity
-
-        grouped_orders[order_no]["order_no"] = order_no
-        grouped_orders[order_no]["total_price"] = total_price
-        grouped_orders[order_no]["items"].append({
-            "food_id": food_id,
-            "food_name": food_name,
-            "quantity": quantity
-        })
-
-    return grouped_orders
+    )
+    # Cursor is the last order_no of the previous page
+    if cursor is not None:
+        page = page.filter(Orders.order_no > cursor)
+    page = page.order_by(Orders.order_no)
+    if limit is not None:
+        page = page.limit(limit)
+    page = page.subquery()
+
+    # Then one row per order of the page with its items aggregated as JSON. Joining and filtering on
+    # order_date as well lets Postgres prune the order_item partitions outside the range.
+    query = db.query(
+        page.c.order_no,
+        page.c.order_date,
+        page.c.total_price,
+        order_items_json(db).label("items")
+    ).join(OrderItem, and_(OrderItem.order_no == page.c.order_no, OrderItem.order_date == page.c.order_date)).filter(
+        OrderItem.order_date >= start_date,
+        OrderItem.order_date <= end_date
+    ).group_by(page.c.order_no, page.c.order_date, page.c.total_price).order_by(page.c.order_no)
+
+    orders = [(order.order_date, {
+        "order_no": order.order_no,
+        "total_price": order.total_price,
+        "items": order.items
+    }) for order in query]
+
+    if include_archived:
+        live_order_nos = {order["order_no"] for _, order in orders}
+        orders += [(order_date, order) for order_date, order in read_archived_orders(start_date, end_date)
+                   if order["order_no"] not in live_order_nos and (cursor is None or order["order_no"] > cursor)]
+        orders.sort(key=lambda entry: entry[1]["order_no"])
+        if limit is not None:
+            orders = orders[:limit]
+    return orders
+
+
+# Function to get one page of orders in a date range (ordered by order_no).
+# Whole days that are over come from order_report_cache, only the rest (today) is queried live.
+def get_orders_by_date(db: Session, start_date, end_date, include_archived: bool = False,
+                       limit: int = 100, cursor: int | None = None):
+    pieces, missing_days = [], []
+    for piece_start, piece_end, day in order_report_cache.split_range(start_date, end_date):
+        if day is None:
+            pieces.append([order for _, order in
+                           query_orders(db, piece_start, piece_end, include_archived, limit + 1, cursor)])
+            continue
+        segment = order_report_cache.get(day, include_archived)
+        if segment is None:
+            missing_days.append(day)
+        else:
+            pieces.append(segment.after(cursor))
+
+    # Uncached days are loaded with one query per run of consecutive days, then cached one segment per day.
+    # Loading is capped at max_fill orders per request: once a run does not fit, it and the remaining runs
+    # are only paged from the database like today's orders.
+    fill_left = order_report_cache.max_fill
+    for run in consecutive_day_runs(missing_days):
+        run_start = datetime.combine(run[0], datetime.min.time())
+        run_end = datetime.combine(run[-1], datetime.max.time())
+        loaded = query_orders(db, run_start, run_end, include_archived, fill_left + 1) if fill_left > 0 else None
+        if loaded is None or len(loaded) > fill_left:
+            fill_left = 0
+            pieces.append([order for _, order in
+                           query_orders(db, run_start, run_end, include_archived, limit + 1, cursor)])
+            continue
+        orders_by_day = {}
+        for order_date, order in loaded:
+            orders_by_day.setdefault(order_date.date(), []).append(order)
+        # Charged like the cache charges it: days without orders still take an entry
+        cost = sum(max(1, len(orders_by_day.get(day, []))) for day in run)
+        if cost > fill_left:
+            fill_left = 0
+            pieces.append([order for _, order in loaded if cursor is None or order["order_no"] > cursor])
+            continue
+        fill_left -= cost
+        for day in run:
+            pieces.append(order_report_cache.put(day, include_archived, orders_by_day.get(day, [])).after(cursor))
+
+    orders = list(islice(heapq.merge(*pieces, key=lambda order: order["order_no"]), limit + 1))
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = orders[-1]["order_no"]
+
+    return {
+        "orders": orders,
+        "page_total_price": sum(order["total_price"] for order in orders),
+        "next_cursor": next_cursor
+    }
+
+
+# Function to group sorted days into runs of consecutive days
+def consecutive_day_runs(days):
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+# Function to get the items most often bought together with the user's cart
+def get_cart_recommendations(db: Session, user_id: int, k: int):
+    cart_food_ids = [food_id for food_id, in db.query(Cart.food_id).filter(Cart.user_id == user_id)]
+    if not cart_food_ids:
+        return []
+
+    # Ask for a few extra in case some companions are sold out, inactive or no longer on the menu
+    scores = dict(co_occurrence_index.recommend(cart_food_ids, k * 2))
+    if not scores:
+        return []
+    foods = db.query(FoodMenu).filter(FoodMenu.food_id.in_(scores), FoodMenu.is_active == "Yes",
+                                      FoodMenu.quantity > 0).all()
+    foods.sort(key=lambda food: scores[food.food_id], reverse=True)
+    return foods[:k]
+
+
+# Function to get one page of a user's orders (newest first) with their items
+def get_user_orders(db: Session, user_id: int, limit: int, cursor: str | None = None):
+    query = db.query(Orders).options(selectinload(Orders.order_items)).filter(Orders.user_id == user_id)
+
+    # Cursor is "<order_date iso>_<order_no>" of the last order on the previous page
+    if cursor:
+        try:
+            cursor_date, cursor_order_no = cursor.rsplit("_", 1)
+            cursor_date, cursor_order_no = datetime.fromisoformat(cursor_date), int(cursor_order_no)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(or_(
+            Orders.order_date < cursor_date,
+            and_(Orders.order_date == cursor_date, Orders.order_no < cursor_order_no)
+        ))
+
+    orders = query.order_by(Orders.order_date.desc(), Orders.order_no.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = f"{orders[-1].order_date.isoformat()}_{orders[-1].order_no}"
+
+    return {
+        "orders": [{
+            "order_no": order.order_no,
+            "status": order.status,
+            "order_date": order.order_date,
+            "total_price": order.total_price,
+            "items": [{
+                "food_id": item.food_id,
+                "food_name": item.food_name,
+                "quantity": item.quantity
+            } for item in order.order_items]
+        } for order in orders],
+        "next_cursor": next_cursor
+    }
 
 
 def create_feedback(db: Session, user_id: int, fullname: str, feedback: CreateFeedback):
@@ -296,7 +632,25 @@ def create_feedback(db: Session, user_id: int, fullname: str, feedback: CreateFe
     return new_feedback
 
 
+# Function to store feedback according to FEEDBACK_WRITE_MODE ("sync", "group" or "async")
+def submit_feedback(db: Session, user_id: int, fullname: str, feedback: CreateFeedback):
+    if FEEDBACK_WRITE_MODE == "sync":
+        return create_feedback(db, user_id, fullname, feedback)
+
+    row = {
+        "user_id": user_id,
+        "name": fullname,
+        "message": feedback.message,
+        "rating": feedback.rating,
+        "created_date": datetime.now(timezone.utc)
+    }
+    try:
+        return group_commit_writer.submit(Feedback, row, wait=FEEDBACK_WRITE_MODE == "group")
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
 def get_all_feedback(db: Session):
     """Fetch all feedback from the database"""
-    return db.query(Feedback).all()
+    return [row._asdict() for row in db.query(*FEEDBACK_COLUMNS)]
 
@@ -1,8 +1,13 @@
 from dotenv import load_dotenv
-from sqlalchemy import create_engine,MetaData
+from sqlalchemy import create_engine,MetaData,text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import SQLAlchemyError
 
+import itertools
+import threading
+import time
 import os
 
 load_dotenv()
@@ -12,6 +17,75 @@ SessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
 metadata = MetaData()
 Base = declarative_base()
 
+# Optional read replicas (comma separated URLs), used by GET endpoints and reports
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "10"))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+
+
+class ReplicaRouter:
+    """Round-robin over replica engines, skipping unhealthy or lagging ones"""
+
+    def __init__(self, urls, max_lag_seconds, check_interval):
+        # Short connect timeout so a dead replica cannot stall the health checker for long
+        self.engines = [create_engine(url, pool_pre_ping=True,
+                                      connect_args={"connect_timeout": REPLICA_CONNECT_TIMEOUT}
+                                      if make_url(url).get_backend_name() == "postgresql" else {})
+                        for url in urls]
+        self.sessions = [sessionmaker(autocommit=False, autoflush=False, bind=replica) for replica in self.engines]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._healthy = [False] * len(self.engines)  # Unknown replicas are skipped until their first check
+        self._checker = None
+
+    # Started from the app startup hook, not at import: with gunicorn --preload the import happens in the
+    # master and a thread started there would not exist in the forked workers
+    def start_health_checks(self):
+        if not self.engines or self._checker is not None:
+            return
+        self._checker = threading.Thread(target=self._check_forever, name="replica-health", daemon=True)
+        self._checker.start()
+
+    def _check_replica(self, index):
+        replica_engine = self.engines[index]
+        try:
+            with replica_engine.connect() as conn:
+                if replica_engine.dialect.name == "postgresql":
+                    # Everything received has been replayed: caught up, however old the last transaction is
+                    # (quiet primary). NULL when the server is not replaying WAL (treated as no lag).
+                    lag = conn.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE EXTRACT(EPOCH FROM (now() - pg_last_xact_replay_timestamp())) END"
+                    )).scalar()
+                    return lag is None or float(lag) <= self.max_lag_seconds
+                conn.execute(text("SELECT 1"))
+                return True
+        except SQLAlchemyError:
+            return False
+
+    # Health checks run in the background so requests never wait on a replica connect
+    def _check_forever(self):
+        while True:
+            for index in range(len(self.engines)):
+                self._healthy[index] = self._check_replica(index)
+            time.sleep(self.check_interval)
+
+    def is_healthy(self, index):
+        return self._healthy[index]
+
+    def get_session(self):
+        # Try each replica once in round-robin order, fall back to the primary
+        for _ in range(len(self.sessions)):
+            index = next(self._counter) % len(self.sessions)
+            if self.is_healthy(index):
+                return self.sessions[index]()
+        return SessionLocal()
+
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_INTERVAL)
+
 
 # Dependency to get database session
 def get_db():
@@ -22,3 +96,11 @@ def get_db():
         db.close()
 
 
+# Dependency to get a read-only session (replica when configured, primary otherwise).
+# Writes and read-your-writes paths (e.g. the cart right after an order) must keep using get_db.
+def get_read_db():
+    db = replica_router.get_session()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,148 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from data.database import engine
+
+# Load environment variables
+load_dotenv()
+
+# A batch is written when it is this old or this big, whichever comes first
+GROUP_COMMIT_INTERVAL_MS = float(os.getenv("GROUP_COMMIT_INTERVAL_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "500"))
+
+# Durability modes for append-only writes:
+#   "sync"  - own transaction per record (the default), durable when the call returns
+#   "group" - batched with other records, the call waits until its batch is committed,
+#             so it is just as durable as "sync" but costs one transaction per batch
+#   "async" - the call returns as soon as the record is queued; records still in the
+#             queue are lost if the process is killed (they are flushed on clean shutdown)
+WRITE_MODES = {"sync", "group", "async"}
+
+logger = logging.getLogger(__name__)
+
+# Queued by drain() to make the writer thread finish its current batch and exit
+STOP = object()
+
+
+class PendingWrite:
+    def __init__(self, table, row: dict):
+        self.table = table
+        self.row = row
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class GroupCommitWriter:
+    """Collects append-only rows from many requests and inserts them in multi-row batches"""
+
+    def __init__(self, interval_ms: float, max_batch: int):
+        self.interval = interval_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    # Queue a row for a model's table; with wait=True block until it is committed and return the stored row
+    def submit(self, model, row: dict, wait: bool = True):
+        pending = PendingWrite(model.__table__, row)
+        self._ensure_started()
+        self._queue.put(pending)
+        if not wait:
+            return row
+        pending.done.wait()
+        if pending.error:
+            raise pending.error
+        return pending.result
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _insert(conn, table, writes):
+        # Executed as multi-row INSERT ... RETURNING, rows come back in submit order
+        stored = conn.execute(insert(table).returning(*table.c, sort_by_parameter_order=True),
+                              [pending.row for pending in writes]).mappings().all()
+        for pending, row in zip(writes, stored):
+            pending.result = dict(row)
+
+    def _flush(self, batch):
+        by_table = {}
+        for pending in batch:
+            by_table.setdefault(pending.table, []).append(pending)
+        try:
+            with engine.begin() as conn:
+                for table, writes in by_table.items():
+                    self._insert(conn, table, writes)
+        except IntegrityError:
+            # One bad row rolls back the whole batch: retry row by row so only that row fails
+            for table, writes in by_table.items():
+                for pending in writes:
+                    try:
+                        with engine.begin() as conn:
+                            self._insert(conn, table, [pending])
+                    except Exception as error:
+                        logger.warning("Group commit could not write a %s row: %s", table.name, error)
+                        pending.result = None
+                        pending.error = error
+        except Exception as error:
+            logger.exception("Group commit of %d rows failed", len(batch))
+            for pending in batch:
+                pending.error = error
+        for pending in batch:
+            pending.done.set()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            writes = [pending for pending in batch if pending is not STOP]
+            if writes:
+                self._flush(writes)
+            if len(writes) < len(batch):
+                return
+
+    # Write whatever is still queued (called on shutdown so "async" records are not dropped).
+    # The writer thread is stopped first, so the batch it already took off the queue is committed too.
+    def drain(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(STOP)
+            thread.join()
+
+        batch = []
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not STOP:
+                batch.append(pending)
+        if batch:
+            self._flush(batch)
+
+
+group_commit_writer = GroupCommitWriter(GROUP_COMMIT_INTERVAL_MS, GROUP_COMMIT_MAX_BATCH)
+atexit.register(group_commit_writer.drain)
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from data.database import engine
+
+# Postgres NOTIFY channel shared by every app node
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """
+    Tells every process (on every node) that a table row changed so local caches can be evicted.
+    Postgres: LISTEN/NOTIFY, one listener thread per process.
+    Other databases (SQLite tests): only the local process is notified.
+    """
+
+    def __init__(self):
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._subscribers = []
+        self._listener = None
+
+    # Register a callback(message); message has "table", "id", "version", "origin" and any extra details.
+    # Messages come from every process, including this one (compare "origin" to skip your own).
+    # table "*" means notifications may have been missed and everything should be refreshed.
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _dispatch(self, message: dict):
+        for callback in self._subscribers:
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("Cache invalidation callback failed for %s", message)
+
+    # Publish after the change is committed (the payload must stay under Postgres' 8000 byte limit)
+    def publish(self, db: Session, table: str, entity_id: int | None, version: int | None = None, **details):
+        message = {"table": table, "id": entity_id, "version": version, "origin": self.origin, **details}
+        self._dispatch(message)
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(func.pg_notify(INVALIDATION_CHANNEL, json.dumps(message)).select())
+            db.commit()
+
+    def start_listener(self):
+        if engine.dialect.name != "postgresql" or self._listener is not None:
+            return
+        self._listener = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        # Its own connection, outside the app pool: the listener holds it for as long as the process runs
+        listen_engine = create_engine(engine.url, poolclass=NullPool)
+        reconnecting = False
+        while True:
+            raw_connection = None
+            try:
+                raw_connection = listen_engine.raw_connection()
+                connection = raw_connection.driver_connection
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+                if reconnecting:
+                    # Changes made while we were not listening are unknown: refresh everything
+                    self._dispatch({"table": "*", "id": None, "version": None, "origin": None})
+                reconnecting = True
+
+                while True:
+                    if select.select([connection], [], [], 5) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        message = json.loads(connection.notifies.pop(0).payload)
+                        # Our own messages were already dispatched by publish()
+                        if message.get("origin") != self.origin:
+                            self._dispatch(message)
+            except Exception:
+                logger.exception("Cache invalidation listener lost its connection, reconnecting")
+                reconnecting = True
+                time.sleep(1)
+            finally:
+                if raw_connection is not None:
+                    try:
+                        raw_connection.invalidate()
+                    except Exception:
+                        pass
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,111 @@
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from data.model.models import FoodMenu, OrderItem, Orders
+
+# Load environment variables
+load_dotenv()
+
+# Identical dishes ordered within this many minutes of each other are cooked together
+KITCHEN_BATCH_WINDOW_MINUTES = float(os.getenv("KITCHEN_BATCH_WINDOW_MINUTES", "5"))
+# Most portions of one dish cooked in a single batch (oven/pan capacity)
+KITCHEN_MAX_BATCH = int(os.getenv("KITCHEN_MAX_BATCH", "10"))
+# Customers are promised their order this many minutes after placing it
+ORDER_PROMISE_MINUTES = float(os.getenv("ORDER_PROMISE_MINUTES", "30"))
+
+
+class KitchenItem:
+    """One pending order line as the scheduler sees it"""
+    __slots__ = ("id", "order_no", "food_id", "food_name", "quantity", "prep_minutes", "ordered_at")
+
+    def __init__(self, id, order_no, food_id, food_name, quantity, prep_minutes, ordered_at):
+        self.id = id
+        self.order_no = order_no
+        self.food_id = food_id
+        self.food_name = food_name
+        self.quantity = quantity
+        self.prep_minutes = prep_minutes
+        self.ordered_at = ordered_at
+
+
+class KitchenBatch:
+    """Portions of one dish from several orders, cooked together"""
+
+    def __init__(self, item: KitchenItem, promise_minutes: float):
+        self.food_id = item.food_id
+        self.food_name = item.food_name
+        self.prep_minutes = item.prep_minutes
+        self.first_ordered_at = item.ordered_at
+        self.promise = timedelta(minutes=promise_minutes)
+        self.items = []
+        self.quantity = 0
+        self.promised_at = None
+
+    def add(self, item: KitchenItem):
+        self.items.append(item)
+        self.quantity += item.quantity
+        promised_at = item.ordered_at + self.promise
+        if self.promised_at is None or promised_at < self.promised_at:
+            self.promised_at = promised_at
+
+    # Latest time cooking can start and still meet the earliest promise in the batch
+    @property
+    def start_by(self):
+        return self.promised_at - timedelta(minutes=self.prep_minutes)
+
+
+# Function to group pending items into batches and put them in cooking order:
+# least slack first (promised time minus prep time), longer dishes first on ties
+def plan_batches(items, window_minutes: float = KITCHEN_BATCH_WINDOW_MINUTES, max_batch: int = KITCHEN_MAX_BATCH,
+                 promise_minutes: float = ORDER_PROMISE_MINUTES):
+    window = timedelta(minutes=window_minutes)
+    batches, open_batches = [], {}
+    for item in sorted(items, key=lambda item: (item.ordered_at, item.id)):
+        batch = open_batches.get(item.food_id)
+        if batch is None or item.ordered_at - batch.first_ordered_at > window \
+                or batch.quantity + item.quantity > max_batch:
+            batch = KitchenBatch(item, promise_minutes)
+            batches.append(batch)
+            open_batches[item.food_id] = batch
+        batch.add(item)
+    batches.sort(key=lambda batch: (batch.start_by, -batch.prep_minutes))
+    return batches
+
+
+# Function to get the kitchen plan for every pending order item
+def get_kitchen_plan(db: Session):
+    rows = db.query(OrderItem.id, OrderItem.order_no, OrderItem.food_id, OrderItem.food_name, OrderItem.quantity,
+                    FoodMenu.prep_minutes, OrderItem.order_date) \
+        .join(FoodMenu, FoodMenu.food_id == OrderItem.food_id).filter(OrderItem.status == "Pending")
+    batches = plan_batches([KitchenItem(*row) for row in rows])
+    return [{
+        "food_id": batch.food_id,
+        "food_name": batch.food_name,
+        "quantity": batch.quantity,
+        "prep_minutes": batch.prep_minutes,
+        "start_by": batch.start_by,
+        "promised_at": batch.promised_at,
+        "order_nos": sorted({item.order_no for item in batch.items}),
+        "item_ids": [item.id for item in batch.items]
+    } for batch in batches]
+
+
+# Function to mark cooked items as done; orders whose items are all done become "Completed"
+def complete_order_items(db: Session, item_ids):
+    done = db.execute(
+        update(OrderItem).where(OrderItem.id.in_(item_ids), OrderItem.status == "Pending")
+        .values(status="Done").returning(OrderItem.order_no)
+        .execution_options(synchronize_session=False)
+    ).all()
+    order_nos = {order_no for order_no, in done}
+
+    still_pending = {order_no for order_no, in db.query(OrderItem.order_no).filter(
+        OrderItem.order_no.in_(order_nos), OrderItem.status == "Pending").distinct()}
+    completed = sorted(order_nos - still_pending)
+    if completed:
+        db.query(Orders).filter(Orders.order_no.in_(completed)).update({"status": "Completed"},
+                                                                     synchronize_session=False)
+    db.commit()
+    return {"items_done": len(done), "orders_completed": completed}
@@ -0,0 +1,293 @@
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from data.database import SessionLocal
+from data.model.models import FoodMenu, Category, MenuChange
+
+# Load environment variables
+load_dotenv()
+
+# Menu snapshot shared by every worker through the page cache (disabled when unset)
+MENU_SNAPSHOT_PATH = os.getenv("MENU_SNAPSHOT_PATH")
+# Stock changes (orders) are gathered for this long and then written in one rebuild
+MENU_SNAPSHOT_REBUILD_DELAY = float(os.getenv("MENU_SNAPSHOT_REBUILD_DELAY", "1"))
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   header    magic, format, menu version, number of menu changes, food count, category count,
+#             (offset, length) of the rendered JSON of the whole menu and of all categories
+#   foods     fixed size records, strings stored as (offset, length) into the string table
+#   categories fixed size records, with the rendered JSON of the category's menu
+#   strings   utf-8 bytes
+# The rendered JSON is exactly what the menu/category endpoints return, so they can send the mapped bytes as is.
+HEADER = struct.Struct("<4sIqqII4I")
+FOOD_RECORD = struct.Struct("<iiid8I")
+CATEGORY_RECORD = struct.Struct("<i6I")
+MAGIC = b"MENU"
+FORMAT_VERSION = 3
+NULL_LENGTH = 0xFFFFFFFF  # length marking a NULL string
+
+
+class MenuItem:
+    """Read-only food menu row, same attribute names as FoodMenu"""
+    __slots__ = ("food_id", "quantity", "category_id", "price",
+                 "food_name", "description", "category_name", "food_image_url")
+
+    def __init__(self, food_id, quantity, category_id, price, food_name, description, category_name, food_image_url):
+        self.food_id = food_id
+        self.quantity = quantity
+        self.category_id = category_id
+        self.price = price
+        self.food_name = food_name
+        self.description = description
+        self.category_name = category_name
+        self.food_image_url = food_image_url
+
+
+class CategoryItem:
+    """Read-only category row, same attribute names as Category"""
+    __slots__ = ("category_id", "name", "image_url")
+
+    def __init__(self, category_id, name, image_url):
+        self.category_id = category_id
+        self.name = name
+        self.image_url = image_url
+
+
+# Response format shared by the category endpoints
+def category_response(category):
+    # Return the image URL as a string (no markdown or HTML)
+    return {
+        "category_id": category.category_id,
+        "name": category.name,
+        "image_url": f"http://localhost:8000/{category.image_url}"  # Just a plain URL
+    }
+
+
+# Response format shared by the menu endpoints
+def food_menu_response(food):
+    return {
+        "food_id": food.food_id,
+        "food_name": food.food_name,
+        "quantity": food.quantity,
+        "description": food.description,
+        "category_id": food.category_id,
+        "category_name": food.category_name,
+        "price": food.price,
+        "food_image_url": f"http://localhost:8000/{food.food_image_url}"  # Just a plain URL
+    }
+
+
+def render_json(responses):
+    return json.dumps(responses, ensure_ascii=False, separators=(",", ":"))
+
+
+class StringTable:
+    def __init__(self):
+        self.data = bytearray()
+
+    def add(self, value):
+        if value is None:
+            return 0, NULL_LENGTH
+        encoded = value.encode("utf-8")
+        offset = len(self.data)
+        self.data += encoded
+        return offset, len(encoded)
+
+
+# Function to read the committed menu state a snapshot file was built from: (version, number of changes)
+def read_snapshot_state(path: str):
+    try:
+        with open(path, "rb") as snapshot:
+            magic, format_version, version, change_count, *_ = HEADER.unpack(snapshot.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        return None
+    return version, change_count
+
+
+# Function to write the menu snapshot: write a new file, then atomically rename it over the old one.
+# No fsync: the snapshot is derived data and every worker rebuilds it at startup.
+# With only_if_changed the file is left alone when it was built from the same committed menu changes.
+def write_menu_snapshot(db: Session, path: str = None, only_if_changed: bool = False):
+    path = path or MENU_SNAPSHOT_PATH
+    if not path:
+        return
+
+    # Serialise concurrent rebuilds (all workers) so the last rename always holds the latest data
+    with open(path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        # Versions are assigned before commit, so a lower version can commit after a higher one was
+        # snapshotted: the number of committed changes tells those apart
+        version, change_count = db.query(func.max(MenuChange.version), func.count(MenuChange.version)).one()
+        version = version or 0
+        if only_if_changed and read_snapshot_state(path) == (version, change_count):
+            return
+        foods = db.query(FoodMenu.food_id, FoodMenu.quantity, FoodMenu.category_id, FoodMenu.price,
+                         FoodMenu.food_name, FoodMenu.description, FoodMenu.category_name,
+                         FoodMenu.food_image_url).order_by(FoodMenu.food_id).all()
+        categories = db.query(Category.category_id, Category.name, Category.image_url) \
+            .order_by(Category.category_id).all()
+
+        strings = StringTable()
+        menu = [food_menu_response(food) for food in foods]
+        menu_by_category = {}
+        for food in menu:
+            menu_by_category.setdefault(food["category_name"], []).append(food)
+        menu_json = strings.add(render_json(menu))
+        categories_json = strings.add(render_json([category_response(category) for category in categories]))
+
+        records = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, version, change_count, len(foods), len(categories),
+                                        *menu_json, *categories_json))
+        for food in foods:
+            records += FOOD_RECORD.pack(food.food_id, food.quantity, food.category_id, food.price,
+                                        *strings.add(food.food_name), *strings.add(food.description),
+                                        *strings.add(food.category_name), *strings.add(food.food_image_url))
+        for category in categories:
+            records += CATEGORY_RECORD.pack(category.category_id,
+                                            *strings.add(category.name), *strings.add(category.image_url),
+                                            *strings.add(render_json(menu_by_category.get(category.name, []))))
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as snapshot:
+            snapshot.write(records)
+            snapshot.write(strings.data)
+        os.replace(temp_path, path)
+
+
+class MenuSnapshotReader:
+    """Maps the snapshot file read-only and remaps it whenever a rebuild replaced it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._inode = None
+        self._map = None
+
+    def _current_map(self):
+        stat = os.stat(self.path)
+        if stat.st_ino != self._inode:
+            with open(self.path, "rb") as snapshot:
+                # memoryview slices below read the mapped pages without copying them
+                new_map = memoryview(mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ))
+            self._map, self._inode = new_map, stat.st_ino
+        return self._map
+
+    def _header(self, data):
+        magic, format_version, version, _, food_count, category_count, *json_refs = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a menu snapshot")
+        strings_offset = HEADER.size + food_count * FOOD_RECORD.size + category_count * CATEGORY_RECORD.size
+        return version, food_count, category_count, strings_offset, json_refs
+
+    @staticmethod
+    def _string(data, strings_offset, offset, length):
+        if length == NULL_LENGTH:
+            return None
+        start = strings_offset + offset
+        return str(data[start:start + length], "utf-8")
+
+    @staticmethod
+    def _bytes(data, strings_offset, offset, length):
+        start = strings_offset + offset
+        return data[start:start + length]
+
+    def _category_records(self, data):
+        _, food_count, category_count, _, _ = self._header(data)
+        start = HEADER.size + food_count * FOOD_RECORD.size
+        return CATEGORY_RECORD.iter_unpack(data[start:start + category_count * CATEGORY_RECORD.size])
+
+    def version(self):
+        return self._header(self._current_map())[0]
+
+    def menu(self, category_name: str = None):
+        data = self._current_map()
+        _, food_count, _, strings_offset, _ = self._header(data)
+        items = []
+        for record in FOOD_RECORD.iter_unpack(data[HEADER.size:HEADER.size + food_count * FOOD_RECORD.size]):
+            food_id, quantity, category_id, price, *string_refs = record
+            food_category = self._string(data, strings_offset, string_refs[4], string_refs[5])
+            if category_name is not None and food_category != category_name:
+                continue
+            items.append(MenuItem(food_id, quantity, category_id, price,
+                                  self._string(data, strings_offset, string_refs[0], string_refs[1]),
+                                  self._string(data, strings_offset, string_refs[2], string_refs[3]),
+                                  food_category,
+                                  self._string(data, strings_offset, string_refs[6], string_refs[7])))
+        return items
+
+    def categories(self):
+        data = self._current_map()
+        strings_offset = self._header(data)[3]
+        return [CategoryItem(category_id, self._string(data, strings_offset, name_offset, name_length),
+                             self._string(data, strings_offset, image_offset, image_length))
+                for category_id, name_offset, name_length, image_offset, image_length, _, _
+                in self._category_records(data)]
+
+    # The rendered JSON of GET /menu/All, or of one category's menu (None for an unknown category).
+    # A view of the mapped file: no rows are decoded, the endpoint copies the bytes once into its response.
+    def menu_json(self, category_name: str = None):
+        data = self._current_map()
+        _, _, _, strings_offset, json_refs = self._header(data)
+        if category_name is None:
+            return self._bytes(data, strings_offset, *json_refs[:2])
+        name = category_name.encode("utf-8")
+        for _, name_offset, name_length, _, _, menu_offset, menu_length in self._category_records(data):
+            if name_length == len(name) and self._bytes(data, strings_offset, name_offset, name_length) == name:
+                return self._bytes(data, strings_offset, menu_offset, menu_length)
+        return None
+
+    # The rendered JSON of GET /category
+    def categories_json(self):
+        data = self._current_map()
+        _, _, _, strings_offset, json_refs = self._header(data)
+        return self._bytes(data, strings_offset, *json_refs[2:])
+
+
+menu_snapshot = MenuSnapshotReader(MENU_SNAPSHOT_PATH) if MENU_SNAPSHOT_PATH else None
+
+_rebuild_lock = threading.Lock()
+_rebuild_timer = None
+
+
+def _rebuild_menu_snapshot():
+    global _rebuild_timer
+    # Cleared before reading, so a change committed during the rebuild schedules another one
+    with _rebuild_lock:
+        _rebuild_timer = None
+    try:
+        with SessionLocal() as db:
+            write_menu_snapshot(db, only_if_changed=True)
+    except Exception:
+        logger.exception("Menu snapshot rebuild failed")
+
+
+# Function to rebuild this node's snapshot soon: every request within MENU_SNAPSHOT_REBUILD_DELAY
+# is served by one rebuild, so a burst of orders does not rewrite the file once per order
+def request_menu_snapshot():
+    global _rebuild_timer
+    if menu_snapshot is None:
+        return
+    with _rebuild_lock:
+        if _rebuild_timer is None:
+            _rebuild_timer = threading.Timer(MENU_SNAPSHOT_REBUILD_DELAY, _rebuild_menu_snapshot)
+            _rebuild_timer.daemon = True
+            _rebuild_timer.start()
+
+
+# Function run when a menu change was published (by any process): rebuild this node's snapshot if it is behind.
+# The message version cannot tell (a lower version may commit late), so the debounced rebuild compares
+# the committed changes with the ones the file was built from.
+def refresh_menu_snapshot(message: dict):
+    if menu_snapshot is None or message["table"] not in ("food_menu", "category", "*"):
+        return
+    request_menu_snapshot()
@@ -1,12 +1,178 @@
+"""Bulk user provisioning: hash passwords on every core and insert users in batches.
+
+Usage:
+    python -m data.model.hash_admin_password import users.csv        # or users.jsonl
+    python -m data.model.hash_admin_password import users.csv --workers 8 --report conflicts.csv
+    python -m data.model.hash_admin_password hash                    # prompt for a password, print its bcrypt hash
+
+Input rows need fullname, user_name, email and password; phone_no, address, post_code
+and role ("user" or "admin") are optional.
+"""
+import argparse
+import csv
+import getpass
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from data.database import SessionLocal
+from data.model.models import User
+from data.schema.schemas import UserCreate
 
 # Setup password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Replace 'your_admin_password' with the actual admin password you want to hash
-admin_password = "gaurav123456"
+ROLES = {"user", "admin"}
+
+
+def hash_password(password: str):
+    return pwd_context.hash(password)
+
+
+# Function to read users from a CSV (with header) or JSONL file as (line number in the file, row)
+def read_users(path: str):
+    with open(path, encoding="utf-8", newline="") as users_file:
+        if path.endswith((".jsonl", ".json")):
+            return [(line_no, json.loads(line)) for line_no, line in enumerate(users_file, start=1) if line.strip()]
+        reader = csv.DictReader(users_file)
+        reader.fieldnames  # Read the header first so line_num counts it
+        rows, line_no = [], reader.line_num + 1
+        for row in reader:
+            rows.append((line_no, row))
+            line_no = reader.line_num + 1  # A quoted field can span several lines
+        return rows
+
+
+# Function to validate rows and drop duplicates inside the file; returns (valid rows, problems)
+def validate_users(rows):
+    valid, problems, seen_names, seen_emails = [], [], set(), set()
+    for line, row in rows:
+        row = {key: value for key, value in row.items() if value not in ("", None)}
+        try:
+            user = UserCreate(**row)
+        except ValidationError as error:
+            problems.append((line, row.get("user_name"), f"invalid: {error.errors()[0]['msg']}"))
+            continue
+        if row.get("post_code") and not str(row["post_code"]).isdigit():
+            problems.append((line, user.user_name, "invalid post_code"))
+            continue
+        role = row.get("role", "user")
+        if role not in ROLES:
+            problems.append((line, user.user_name, f"invalid role {role!r}"))
+            continue
+        if user.user_name in seen_names or user.email in seen_emails:
+            problems.append((line, user.user_name, "duplicate in file"))
+            continue
+        seen_names.add(user.user_name)
+        seen_emails.add(user.email)
+        valid.append((line, {
+            "fullname": user.fullname,
+            "user_name": user.user_name,
+            "email": user.email,
+            "password": user.password,
+            "phone_no": user.phone_no,
+            "address": row.get("address"),
+            "post_code": int(row["post_code"]) if row.get("post_code") else None,
+            "role": role
+        }))
+    return valid, problems
+
+
+# Function to drop users whose user_name or email is already taken in the database
+def remove_existing(db, users, problems, chunk_size: int = 1000):
+    taken_names, taken_emails = set(), set()
+    for start in range(0, len(users), chunk_size):
+        chunk = [user for _, user in users[start:start + chunk_size]]
+        taken_names.update(name for name, in db.query(User.user_name)
+                           .filter(User.user_name.in_([user["user_name"] for user in chunk])))
+        taken_emails.update(email for email, in db.query(User.email)
+                            .filter(User.email.in_([user["email"] for user in chunk])))
+
+    remaining = []
+    for line, user in users:
+        if user["user_name"] in taken_names:
+            problems.append((line, user["user_name"], "user_name already exists"))
+        elif user["email"] in taken_emails:
+            problems.append((line, user["user_name"], "email already exists"))
+        else:
+            remaining.append((line, user))
+    return remaining
+
+
+# Function to insert users in multi-row batches, retrying a failed batch row by row
+def insert_users(db, users, problems, batch_size: int):
+    inserted = 0
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        try:
+            db.execute(insert(User), [user for _, user in batch])
+            db.commit()
+            inserted += len(batch)
+        except IntegrityError:
+            # Someone registered the same name meanwhile: find out which rows conflict
+            db.rollback()
+            for line, user in batch:
+                try:
+                    db.execute(insert(User), [user])
+                    db.commit()
+                    inserted += 1
+                except IntegrityError:
+                    db.rollback()
+                    problems.append((line, user["user_name"], "conflicts with an existing user"))
+    return inserted
+
+
+def import_users(args):
+    started = time.perf_counter()
+    valid, problems = validate_users(read_users(args.file))
+
+    with SessionLocal() as db:
+        users = remove_existing(db, valid, problems)
+
+        # bcrypt is deliberately slow: spread it over every core
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            hashes = pool.map(hash_password, [user["password"] for _, user in users], chunksize=64)
+            for (_, user), hashed_password in zip(users, hashes):
+                user["password"] = hashed_password
+        hashed_at = time.perf_counter()
+
+        inserted = insert_users(db, users, problems, args.batch_size)
+
+    print(f"Inserted {inserted} users, {len(problems)} rejected "
+          f"(hashing {hashed_at - started:.1f}s, total {time.perf_counter() - started:.1f}s)")
+    if problems:
+        report = open(args.report, "w", newline="", encoding="utf-8") if args.report else sys.stdout
+        writer = csv.writer(report)
+        writer.writerow(["line", "user_name", "reason"])
+        writer.writerows(sorted(problems))
+        if args.report:
+            report.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision users in bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import users from a CSV or JSONL file")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="hashing processes")
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.add_argument("--report", help="write rejected rows to this CSV instead of stdout")
+
+    # The password is prompted for so it does not end up in the shell history or process list
+    commands.add_parser("hash", help="prompt for a password and print its bcrypt hash")
+
+    args = parser.parse_args()
+    if args.command == "hash":
+        print("Hashed Password:", hash_password(getpass.getpass("Password: ")))
+    else:
+        import_users(args)
 
-# Generate the hashed password
-hashed_password = pwd_context.hash(admin_password)
 
-print("Hashed Admin Password:", hashed_password)
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Index
 from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 from data.database import Base
@@ -55,6 +55,8 @@ class FoodMenu(Base):
     price = Column(Float, nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"))
     food_image_url = Column(String, nullable=True)
+    # Minutes to cook one batch, used by the kitchen scheduler (data/kitchen.py)
+    prep_minutes = Column(Integer, nullable=False, default=10, server_default="10")
 
     category = relationship("Category", back_populates="food_menus")
     user = relationship("User", back_populates="food_menus")
@@ -75,6 +77,8 @@ class Cart(Base):
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     price = Column(Float, nullable=False)
     total_price = Column(Float, nullable=False)
+    # Used by the abandoned cart sweeper (data/cart_sweeper.py)
+    created_date = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
     user = relationship("User", back_populates="carts")
     food = relationship("FoodMenu", back_populates="carts")
@@ -86,15 +90,21 @@ class Cart(Base):
 
 class Orders(Base):
     __tablename__ = "orders"
+    # Customer order history is read newest first per user (keyset paginated)
+    __table_args__ = (Index("ix_orders_user_id_order_date", "user_id", "order_date"),)
 
     order_no = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     status = Column(String, default="Pending")
-    order_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Partition key on Postgres (monthly ranges, see data/partitions.py)
+    order_date = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     total_price = Column(Float, nullable=False)
 
     user = relationship("User", back_populates="orders")
-    order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    # order_no alone is not unique on Postgres (key is (order_no, order_date)), so join on both
+    order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan",
+                               primaryjoin="and_(Orders.order_no == foreign(OrderItem.order_no), "
+                                           "Orders.order_date == foreign(OrderItem.order_date))")
 
     def __repr__(self):
         return f"<Order(order_no={self.order_no}, status={self.status}, total_price={self.total_price})>"
@@ -108,8 +118,19 @@ class OrderItem(Base):
     food_id = Column(Integer, ForeignKey("food_menu.food_id", ondelete="CASCADE"), nullable=False)
     food_name = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
+    # Copy of the parent order date so order items share the order's partition
+    order_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # "Pending" until the kitchen has cooked it, then "Done"
+    status = Column(String, default="Pending")
+
+    # The kitchen queue only ever reads pending items; order history and reports load items per order
+    __table_args__ = (Index("ix_order_item_pending", "food_id", postgresql_where=status == "Pending",
+                            sqlite_where=status == "Pending"),
+                      Index("ix_order_item_order_no_order_date", "order_no", "order_date"))
 
-    order = relationship("Orders", back_populates="order_items")
+    order = relationship("Orders", back_populates="order_items",
+                         primaryjoin="and_(Orders.order_no == foreign(OrderItem.order_no), "
+                                     "Orders.order_date == foreign(OrderItem.order_date))")
     food = relationship("FoodMenu", back_populates="order_items")
 
     def __repr__(self):
@@ -132,3 +153,15 @@ class Feedback(Base):
         return f"<Feedback(user_id={self.user_id}, rating={self.rating})>"
 
 
+class MenuChange(Base):
+    __tablename__ = "menu_change"
+
+    # Monotonically increasing menu version, clients sync with /menu/changes?since=<version>
+    version = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    entity = Column(String, nullable=False)  # "food_menu" or "category"
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)  # "create", "update" or "delete"
+    created_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<MenuChange(version={self.version}, entity={self.entity}, action={self.action})>"
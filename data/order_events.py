@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from dotenv import load_dotenv
+from sqlalchemy.orm import selectinload
+from data.database import SessionLocal
+from data.invalidation import invalidation_bus
+from data.model.models import Orders
+
+# Load environment variables
+load_dotenv()
+
+# How many recent events are kept for clients resuming with Last-Event-ID
+ORDER_EVENT_HISTORY = int(os.getenv("ORDER_EVENT_HISTORY", "1000"))
+# How many undelivered events a slow client may have before it is disconnected
+ORDER_EVENT_QUEUE_SIZE = int(os.getenv("ORDER_EVENT_QUEUE_SIZE", "100"))
+
+
+class OrderSubscriber:
+    """One connected stream; events are handed over on the subscriber's event loop"""
+
+    def __init__(self, loop, queue_size: int):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, event):
+        if self.queue.full():
+            # Too slow to keep up: drop what is queued and tell the stream to close.
+            # The client reconnects with Last-Event-ID and catches up from the history.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+
+class OrderEventHub:
+    """
+    In-process broadcast of new orders to every connected kitchen/admin stream.
+    Each worker process has its own hub; orders placed on other workers/nodes arrive
+    through the invalidation bus (publish_order_event), so every stream sees every order.
+    """
+
+    def __init__(self, history_size: int, queue_size: int):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history_size)  # (event_id, json data)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    # Called from a worker or listener thread, so hand the event to each loop thread-safely.
+    # The event id is the order_no, the same in every process, so a client can resume on any worker.
+    def publish(self, data: dict):
+        with self._lock:
+            event = (data["order_no"], json.dumps(data, default=str))
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+
+    # Register a stream; returns the subscriber and the events it missed since last_event_id.
+    # missed is None when this process cannot tell what was missed (the client's last event is older than
+    # anything kept here, e.g. a worker that started later) and the client must reload.
+    def subscribe(self, last_event_id: int | None = None):
+        subscriber = OrderSubscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if last_event_id is None:
+                return subscriber, []
+            if not self._history or min(event_id for event_id, _ in self._history) > last_event_id:
+                return subscriber, None
+            return subscriber, [event for event in self._history if event[0] > last_event_id]
+
+    def unsubscribe(self, subscriber: OrderSubscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+
+order_hub = OrderEventHub(ORDER_EVENT_HISTORY, ORDER_EVENT_QUEUE_SIZE)
+
+
+# Function to build the stream event of an order (items: order items or the cart lines they came from)
+def order_event(order, items):
+    return {
+        "order_no": order.order_no,
+        "user_id": order.user_id,
+        "status": order.status,
+        "order_date": order.order_date.isoformat(),
+        "total_price": order.total_price,
+        "items": [{
+            "food_id": item.food_id,
+            "food_name": item.food_name,
+            "quantity": item.quantity
+        } for item in items]
+    }
+
+
+# Function run for published invalidations: push orders placed by other processes to this process' streams.
+# The message only carries the order number (NOTIFY payloads are limited to 8000 bytes), so read the order.
+def publish_order_event(message: dict):
+    if message["table"] != "orders" or message["origin"] == invalidation_bus.origin:
+        return
+    with SessionLocal() as db:
+        order = db.query(Orders).options(selectinload(Orders.order_items)) \
+            .filter(Orders.order_no == message["id"]).first()
+        if order is not None:
+            order_hub.publish(order_event(order, order.order_items))
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+# Load environment variables
+load_dotenv()
+
+# Tables that are range partitioned by month on order_date (Postgres only)
+PARTITIONED_TABLES = ["orders", "order_item"]
+# Running processes create upcoming month partitions this often (not only at startup)
+ORDER_PARTITION_CHECK_SECONDS = float(os.getenv("ORDER_PARTITION_CHECK_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
+
+
+# Function to get the first day of the month for a date
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+# Function to get the first day of the following month
+def next_month(value):
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+# Function to list month starts from first to last (inclusive)
+def months_between(first, last):
+    month = month_start(first)
+    while month <= month_start(last):
+        yield month
+        month = next_month(month)
+
+
+def partition_name(table: str, month):
+    return f"{table}_{month.year}_{month.month:02d}"
+
+
+def is_partitioned(conn, table: str):
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+    ), {"table": table}).first() is not None
+
+
+# Function to create the monthly partition of a table if it is missing
+def create_month_partition(conn, table: str, month):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    ))
+
+
+def table_exists(conn, name: str):
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+# Function to create a month's partitions of both order tables. Rows of that month that already went to
+# the default partitions (no partition existed yet) are moved into them first, because Postgres refuses
+# to create a partition whose range the default partition holds rows for.
+def create_order_month_partitions(conn, month):
+    if all(table_exists(conn, partition_name(table, month)) for table in PARTITIONED_TABLES):
+        return
+    in_month = f"order_date >= '{month.isoformat()}' AND order_date < '{next_month(month).isoformat()}'"
+    stranded = table_exists(conn, "orders_default") and conn.execute(
+        text(f"SELECT 1 FROM orders_default WHERE {in_month} LIMIT 1")).first() is not None
+    if not stranded:
+        for table in PARTITIONED_TABLES:
+            create_month_partition(conn, table, month)
+        return
+
+    # Copy the rows into standalone tables, remove them from the defaults (items first, they reference
+    # orders), then attach the tables as the month's partitions
+    for table in PARTITIONED_TABLES:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+                          f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        conn.execute(text(f"INSERT INTO {partition_name(table, month)} SELECT * FROM {table}_default "
+                          f"WHERE {in_month}"))
+    for table in reversed(PARTITIONED_TABLES):
+        conn.execute(text(f"DELETE FROM {table}_default WHERE {in_month}"))
+    for table in PARTITIONED_TABLES:
+        conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {partition_name(table, month)} "
+                          f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"))
+    logger.warning("Moved %s orders out of the default partition", month.strftime("%Y-%m"))
+
+
+# Function to make sure partitions exist for the current and upcoming months
+def ensure_order_partitions(engine, months_ahead: int = 2):
+    with engine.begin() as conn:
+        if not is_partitioned(conn, "orders"):
+            return
+        # Every worker runs this; one at a time
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('order_partitions'))"))
+        month = month_start(datetime.now())
+        for _ in range(months_ahead + 1):
+            create_order_month_partitions(conn, month)
+            month = next_month(month)
+
+
+# Background loop started with the app, so a long running process never runs past its last partition
+async def run_partition_maintenance(engine):
+    while True:
+        await asyncio.sleep(ORDER_PARTITION_CHECK_SECONDS)
+        try:
+            await asyncio.to_thread(ensure_order_partitions, engine)
+        except Exception:
+            logger.exception("Creating upcoming order partitions failed")
+
+
+# Function to detach and drop the monthly partitions of both order tables
+def drop_month_partitions(conn, month, keep_detached: bool = False):
+    # order_item references orders, so it has to go first
+    for table in reversed(PARTITIONED_TABLES):
+        name = partition_name(table, month)
+        if not table_exists(conn, name):
+            continue
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if not keep_detached:
+            conn.execute(text(f"DROP TABLE {name}"))
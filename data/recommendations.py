@@ -0,0 +1,114 @@
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from itertools import combinations
+from sqlalchemy import func
+from data.database import SessionLocal
+from data.invalidation import invalidation_bus
+from data.model.models import OrderItem
+
+# Companions kept per item when answering; more would not change a top-K for small K
+TOP_COMPANIONS = 50
+
+logger = logging.getLogger(__name__)
+
+
+class CoOccurrenceIndex:
+    """
+    Sparse "bought together" counts: counts[a][b] is how many orders contained both a and b.
+    Built once from order history, then kept current by place_order.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(dict)
+        self._top = {}  # food_id -> [(count, companion_id)] cache, dropped when the item's counts change
+        self._lock = threading.Lock()
+        self._building = False
+        self._pending = []  # orders placed while a rebuild is running: (order_no, food_ids)
+        self.built_upto = 0  # highest order_no included by the last rebuild
+
+    @staticmethod
+    def _count_order(counts, food_ids):
+        for first, second in combinations(sorted(set(food_ids)), 2):
+            counts[first][second] = counts[first].get(second, 0) + 1
+            counts[second][first] = counts[second].get(first, 0) + 1
+
+    # Called from place_order after commit
+    def add_order(self, order_no: int, food_ids):
+        with self._lock:
+            if self._building:
+                self._pending.append((order_no, food_ids))
+            self._count_order(self._counts, food_ids)
+            for food_id in food_ids:
+                self._top.pop(food_id, None)
+
+    # Batch job: count every order in history into a fresh index, then swap it in
+    def build_from_history(self, db, batch_size: int = 10000):
+        with self._lock:
+            self._building = True
+            self._pending = []
+        try:
+            built_upto = db.query(func.max(OrderItem.order_no)).scalar() or 0
+            counts = defaultdict(dict)
+            rows = db.query(OrderItem.order_no, OrderItem.food_id) \
+                .filter(OrderItem.order_no <= built_upto).order_by(OrderItem.order_no).yield_per(batch_size)
+            current_order, food_ids = None, []
+            for order_no, food_id in rows:
+                if order_no != current_order:
+                    self._count_order(counts, food_ids)
+                    current_order, food_ids = order_no, []
+                food_ids.append(food_id)
+            self._count_order(counts, food_ids)
+        finally:
+            with self._lock:
+                self._building = False
+                pending, self._pending = self._pending, []
+
+        with self._lock:
+            # Orders placed during the build that the history query did not see
+            for order_no, food_ids in pending:
+                if order_no > built_upto:
+                    self._count_order(counts, food_ids)
+            self._counts, self._top, self.built_upto = counts, {}, built_upto
+
+    def _companions(self, food_id: int):
+        top = self._top.get(food_id)
+        if top is None:
+            companions = self._counts.get(food_id, {})
+            top = heapq.nlargest(TOP_COMPANIONS, ((count, companion) for companion, count in companions.items()))
+            self._top[food_id] = top
+        return top
+
+    # Top-K items most often bought with the given items, excluding the items themselves
+    def recommend(self, food_ids, k: int = 5):
+        scores = defaultdict(int)
+        with self._lock:
+            for food_id in set(food_ids):
+                for count, companion in self._companions(food_id):
+                    scores[companion] += count
+        for food_id in food_ids:
+            scores.pop(food_id, None)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+co_occurrence_index = CoOccurrenceIndex()
+
+
+# Function run in the background at startup so the app does not wait for the history scan
+def build_co_occurrence_index():
+    try:
+        with SessionLocal() as db:
+            co_occurrence_index.build_from_history(db)
+        logger.info("Co-occurrence index built from %d orders", co_occurrence_index.built_upto)
+    except Exception:
+        logger.exception("Building the co-occurrence index failed")
+
+
+# Function run for published orders: count orders placed by other processes/nodes
+def count_published_order(message: dict):
+    if message["table"] == "*":
+        # Orders may have been missed while disconnected
+        threading.Thread(target=build_co_occurrence_index, daemon=True).start()
+    elif message["table"] == "orders" and message["origin"] != invalidation_bus.origin:
+        co_occurrence_index.add_order(message["id"], message["food_ids"])
@@ -0,0 +1,150 @@
+import bisect
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Upper bound on orders held by the cache (all segments together, a day without orders counts as one),
+# least recently used days go first. Every worker process has its own cache, so the memory used on a
+# node is this times the number of workers.
+ORDER_REPORT_CACHE_MAX_ORDERS = int(os.getenv("ORDER_REPORT_CACHE_MAX_ORDERS", "200000"))
+# Most orders one report request may load into the cache; larger uncached ranges are paged from the
+# database instead, so a long scan neither loads it all into memory nor pushes every other day out
+ORDER_REPORT_CACHE_MAX_FILL = int(os.getenv("ORDER_REPORT_CACHE_MAX_FILL",
+                                            str(ORDER_REPORT_CACHE_MAX_ORDERS // 10)))
+# A day is only cached this long after midnight (UTC), so late commits and replica lag are included
+ORDER_REPORT_CLOSE_GRACE_SECONDS = float(os.getenv("ORDER_REPORT_CLOSE_GRACE_SECONDS", "300"))
+
+ONE_DAY = timedelta(days=1)
+END_OF_DAY = ONE_DAY - timedelta(microseconds=1)
+
+
+class DaySegment:
+    """The orders of one closed day, sorted by order_no"""
+    __slots__ = ("orders", "order_nos")
+
+    def __init__(self, orders):
+        self.orders = tuple(orders)
+        self.order_nos = [order["order_no"] for order in self.orders]
+
+    # Space charged against the cache bound; empty days still cost an entry
+    def size(self):
+        return max(1, len(self.orders))
+
+    # Orders after a page cursor, without copying the segment
+    def after(self, cursor: int | None):
+        start = 0 if cursor is None else bisect.bisect_right(self.order_nos, cursor)
+        return (self.orders[index] for index in range(start, len(self.orders)))
+
+
+class ClosedDayCache:
+    """
+    Order report results for days that are over. Orders are never changed once placed,
+    so a closed day is cached until it is evicted for space or its month is archived.
+    """
+
+    def __init__(self, max_orders: int, close_grace_seconds: float, max_fill: int):
+        self.max_orders = max_orders
+        self.max_fill = max_fill
+        self.close_grace = timedelta(seconds=close_grace_seconds)
+        self._segments = OrderedDict()  # (day, include_archived) -> DaySegment
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Split [start, end] into pieces (piece_start, piece_end, day): day is set for whole closed days
+    # (cacheable), None for the parts that must be read live (today, partial days at the edges)
+    def split_range(self, start: datetime, end: datetime, now: datetime | None = None):
+        # Order dates are stored as naive UTC
+        closed_before = (now or datetime.now(timezone.utc).replace(tzinfo=None)) - self.close_grace
+        day_start = datetime.combine(start.date(), time.min)
+        if day_start < start:
+            day_start += ONE_DAY
+
+        piece_start = start
+        while day_start + END_OF_DAY <= end and day_start + ONE_DAY <= closed_before:
+            if piece_start < day_start:
+                yield piece_start, day_start - timedelta(microseconds=1), None
+            yield day_start, day_start + END_OF_DAY, day_start.date()
+            piece_start = day_start = day_start + ONE_DAY
+        if piece_start <= end:
+            yield piece_start, end, None
+
+    def get(self, day: date, include_archived: bool):
+        with self._lock:
+            segment = self._segments.get((day, include_archived))
+            if segment is None:
+                self.misses += 1
+                return None
+            self._segments.move_to_end((day, include_archived))
+            self.hits += 1
+            return segment
+
+    def put(self, day: date, include_archived: bool, orders):
+        segment = DaySegment(orders)
+        if segment.size() > self.max_orders:
+            return segment
+        with self._lock:
+            previous = self._segments.pop((day, include_archived), None)
+            if previous is not None:
+                self._size -= previous.size()
+            self._segments[(day, include_archived)] = segment
+            self._size += segment.size()
+            while self._size > self.max_orders:
+                _, evicted = self._segments.popitem(last=False)
+                self._size -= evicted.size()
+                self.evictions += 1
+        return segment
+
+    # Drop cached days of a month (its orders were archived out of the database)
+    def evict_month(self, month: date):
+        with self._lock:
+            for key in [key for key in self._segments if (key[0].year, key[0].month) == (month.year, month.month)]:
+                self._size -= self._segments.pop(key).size()
+
+    # Drop cached days with orders of a food (deleting a food also deletes its past order items)
+    def evict_food(self, food_id: int):
+        with self._lock:
+            for key in [key for key, segment in self._segments.items()
+                        if any(item["food_id"] == food_id for order in segment.orders for item in order["items"])]:
+                self._size -= self._segments.pop(key).size()
+
+    def clear(self):
+        with self._lock:
+            self._segments.clear()
+            self._size = 0
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "cached_days": len(self._segments),
+                "size": self._size,
+                "max_size": self.max_orders
+            }
+
+
+order_report_cache = ClosedDayCache(ORDER_REPORT_CACHE_MAX_ORDERS, ORDER_REPORT_CLOSE_GRACE_SECONDS,
+                                    ORDER_REPORT_CACHE_MAX_FILL)
+
+
+# Function run for published invalidations: archived months lose their orders from the database,
+# deleted foods lose their order items
+def evict_order_reports(message: dict):
+    # A deleted category takes all its foods (and their order items) with it; rare enough to start over
+    if message["table"] == "*" or (message["table"] == "category" and message.get("action") == "delete"):
+        order_report_cache.clear()
+    elif message["table"] == "orders_archive":
+        order_report_cache.evict_month(date.fromisoformat(message["month"]))
+    elif message["table"] == "food_menu" and message.get("action") == "delete":
+        order_report_cache.evict_food(message["id"])
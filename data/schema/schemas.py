@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, constr, field_validator
+from pydantic import BaseModel, EmailStr, Field, constr, field_validator
 from typing import Optional
 from datetime import datetime
 from typing import List
@@ -94,11 +94,23 @@ class CreateFoodMenu(BaseModel):
     is_active: str
     price: float
     food_image_url: Optional[str]
+    prep_minutes: int = Field(10, ge=1)
 
 
 class FoodMenuUpdate(BaseModel):
     quantity: Optional[int] = None
     price: Optional[float] = None
+    prep_minutes: Optional[int] = Field(None, ge=1)
+
+
+# Bulk update: select items by food_ids or category_id, then set any of price/quantity/is_active/prep_minutes
+class BulkFoodMenuUpdate(BaseModel):
+    food_ids: Optional[List[int]] = None
+    category_id: Optional[int] = None
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+    is_active: Optional[str] = None
+    prep_minutes: Optional[int] = Field(None, ge=1)
 
 
 class CreateFoodMenuResponse(BaseModel):
@@ -116,6 +128,11 @@ class GetFoodMenuResponse(BaseModel):
     food_image_url: Optional[str]
 
 
+class BulkFoodMenuUpdateResponse(BaseModel):
+    message: str
+    updated: List[GetFoodMenuResponse]
+
+
 # Create Cart to store Order Food
 class AddToCart(BaseModel):
     food_id: int
@@ -136,6 +153,14 @@ class CartResponse(BaseModel):
     total_price: float
 
 
+# Everything the app start screen needs in one response (cart is null for admins)
+class BootstrapResponse(BaseModel):
+    profile: UserInformation
+    categories: List[CreateCategory]
+    menu: List[GetFoodMenuResponse]
+    cart: Optional[CartResponse]
+
+
 class CreateFeedback(BaseModel):
     message: str
     rating: float
@@ -152,3 +177,38 @@ class OrderItemResponse(BaseModel):
 class OrderResponse(BaseModel):
     orders: List[OrderItemResponse]
 
+
+
+class OrderHistoryItem(BaseModel):
+    food_id: int
+    food_name: str
+    quantity: int
+
+
+class OrderHistory(BaseModel):
+    order_no: int
+    status: str | None
+    order_date: datetime
+    total_price: float
+    items: List[OrderHistoryItem]
+
+
+# Page of the current user's orders, pass next_cursor back to get the following page
+class OrderHistoryResponse(BaseModel):
+    orders: List[OrderHistory]
+    next_cursor: Optional[str]
+
+
+# Menu delta sync: full=True means menu/categories are a complete snapshot
+class MenuChangesResponse(BaseModel):
+    full: bool
+    version: int
+    menu: List[GetFoodMenuResponse]
+    categories: List[CreateCategory]
+    deleted_menu: List[int]
+    deleted_categories: List[int]
+
+
+# Mark cooked order items (the item_ids of one or more kitchen batches) as done
+class KitchenBatchComplete(BaseModel):
+    item_ids: List[int] = Field(..., min_length=1)
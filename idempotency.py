@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# How long a stored response is replayed for, and how many keys are kept at most
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# Optional shared store so a retry landing on another worker or node still finds its key
+IDEMPOTENCY_REDIS_URL = os.getenv("IDEMPOTENCY_REDIS_URL")
+
+IN_PROGRESS = object()
+
+
+class IdempotencyStore:
+    """
+    Recent Idempotency-Keys with their responses, kept in this process only.
+    Oldest first so expiry is a pop from the front.
+    """
+
+    def __init__(self, ttl: int, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries = OrderedDict()  # key -> (expires_at, fingerprint, response)
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._entries:
+            key, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+        # Over the limit: drop the oldest completed keys, never ones whose request is still running
+        if len(self._entries) >= self.max_keys:
+            for key, (_, _, response) in list(self._entries.items()):
+                if len(self._entries) < self.max_keys:
+                    break
+                if response is not IN_PROGRESS:
+                    del self._entries[key]
+
+    # Reserve a key; returns None for a new key, IN_PROGRESS, or the stored response
+    def begin(self, key, fingerprint: str):
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_keys:
+                    raise HTTPException(status_code=503, detail="Too many requests in progress, please retry",
+                                        headers={"Retry-After": "1"})
+                self._entries[key] = (now + self.ttl, fingerprint, IN_PROGRESS)
+                return None
+            if entry[1] != fingerprint:
+                raise HTTPException(status_code=422,
+                                    detail="Idempotency-Key was already used with a different request")
+            return entry[2]
+
+    def complete(self, key, response):
+        with self._lock:
+            if key in self._entries:
+                expires_at, fingerprint, _ = self._entries[key]
+                self._entries[key] = (expires_at, fingerprint, response)
+
+    # Forget a key whose request failed so the client can retry it
+    def release(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    """Idempotency-Keys shared by every worker through Redis, expired by Redis after the TTL"""
+
+    def __init__(self, url: str, ttl: int):
+        import redis  # Only needed when a shared store is configured
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _name(key):
+        return "idempotency:" + ":".join(str(part) for part in key)
+
+    # Reserve a key; returns None for a new key, IN_PROGRESS, or the stored response
+    def begin(self, key, fingerprint: str):
+        name = self._name(key)
+        while True:
+            # SET NX reserves the key atomically across workers
+            if self._client.set(name, json.dumps({"fingerprint": fingerprint, "done": False}), nx=True, ex=self.ttl):
+                return None
+            stored = self._client.get(name)
+            if stored is not None:
+                break
+            # Expired or released between SET and GET: try to reserve it again
+        entry = json.loads(stored)
+        if entry["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422,
+                                detail="Idempotency-Key was already used with a different request")
+        return entry["response"] if entry["done"] else IN_PROGRESS
+
+    def complete(self, key, response):
+        entry = {"fingerprint": None, "done": True, "response": response}
+        name = self._name(key)
+        stored = self._client.get(name)
+        if stored is not None:
+            entry["fingerprint"] = json.loads(stored)["fingerprint"]
+            self._client.set(name, json.dumps(entry, default=str), xx=True, keepttl=True)
+
+    # Forget a key whose request failed so the client can retry it
+    def release(self, key):
+        self._client.delete(self._name(key))
+
+
+def get_idempotency_store():
+    if IDEMPOTENCY_REDIS_URL:
+        return RedisIdempotencyStore(IDEMPOTENCY_REDIS_URL, IDEMPOTENCY_KEY_TTL)
+    return IdempotencyStore(IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_MAX_KEYS)
+
+
+idempotency_store = get_idempotency_store()
+
+
+# Function to run a write once per Idempotency-Key; retries get the original response back
+def run_idempotent(idempotency_key: str | None, user_id: int, scope: str, payload, handler):
+    if not idempotency_key:
+        return handler()
+
+    key = (user_id, scope, idempotency_key)
+    fingerprint = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    stored = idempotency_store.begin(key, fingerprint)
+    if stored is IN_PROGRESS:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    if stored is not None:
+        return stored
+
+    try:
+        response = handler()
+    except Exception:
+        idempotency_store.release(key)
+        raise
+    idempotency_store.complete(key, response)
+    return response
@@ -1,15 +1,40 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Query, Request, Header
+from fastapi.responses import Response, StreamingResponse, PlainTextResponse
 from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
 from data.database import *
-from auth import create_access_token, get_current_user
+from auth import create_access_token, get_current_user, get_token_payload
 from data.curd import *
 from data.schema.schemas import *
 from data.model.models import *
 from typing import List
 from swagger_config import custom_openapi  # Import the custom Swagger configuration
 from fastapi.staticfiles import StaticFiles
+from rate_limit import AdmissionControlMiddleware
+from idempotency import run_idempotent
+from traffic_recorder import TrafficRecorderMiddleware, TRAFFIC_RECORD_SAMPLE_RATE
+from profiler import ProfilerMiddleware, PROFILE_ON_DEMAND, PROFILE_SAMPLE_RATE, PROFILE_DIR
+from data.cart_sweeper import run_cart_sweeper, cart_sweeper_metrics
+from data.recommendations import build_co_occurrence_index, count_published_order
+from data.group_commit import group_commit_writer
+from data.partitions import ensure_order_partitions, run_partition_maintenance
+from data.order_events import order_hub, publish_order_event
+from data.menu_snapshot import menu_snapshot, MENU_SNAPSHOT_PATH, refresh_menu_snapshot, category_response, \
+    food_menu_response
+from data.invalidation import invalidation_bus
+from data.report_cache import order_report_cache, evict_order_reports
+from data.kitchen import get_kitchen_plan, complete_order_items, KITCHEN_BATCH_WINDOW_MINUTES, KITCHEN_MAX_BATCH
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
+if PROFILE_ON_DEMAND or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilerMiddleware)  # Opt-in, not installed at all when disabled
+if TRAFFIC_RECORD_SAMPLE_RATE > 0:
+    app.add_middleware(TrafficRecorderMiddleware)  # Opt-in, only admitted requests are recorded
+app.add_middleware(AdmissionControlMiddleware)
 app.mount("/menu_images", StaticFiles(directory="templates/images/menu"), name="menu_images")
 app.mount("/category_images", StaticFiles(directory="templates/images/category"), name="category_images")
 
@@ -26,12 +51,92 @@ app.openapi = lambda: custom_openapi(app)
 # Function to create all tables automatically
 def create_tables():
     Base.metadata.create_all(bind=engine)  # Recreates tables with new schema
+    try:
+        ensure_order_partitions(engine)  # Monthly order partitions on Postgres (no-op elsewhere)
+    except SQLAlchemyError:
+        # Orders still go to the default partition; the maintenance task retries
+        logger.exception("Could not create the order partitions")
+    if MENU_SNAPSHOT_PATH:
+        with SessionLocal() as db:
+            write_menu_snapshot(db)  # Make sure every worker starts with a current snapshot
 
 
 # Call create_tables once during application start
 create_tables()
 
 
+# Response format of GET /me
+def user_profile_response(user: User):
+    return {
+        "fullname": user.fullname,
+        "user_name": user.user_name,
+        "email": user.email,
+        "phone_no": user.phone_no,
+        "address": user.address,
+        "post_code": user.post_code,
+        "role": user.role,
+        "created_date": user.created_date
+    }
+
+
+# All categories as returned by GET /category: shared menu snapshot when enabled, database otherwise
+def category_list(db: Session):
+    category = menu_snapshot.categories() if menu_snapshot else get_category_rows(db)
+    return [category_response(food) for food in category]
+
+
+# The whole menu as returned by GET /menu/All
+def full_menu_list(db: Session):
+    menu = menu_snapshot.menu() if menu_snapshot else get_menu_rows(db)
+    return [food_menu_response(food) for food in menu]
+
+
+# A user's cart as returned by GET /cart
+def cart_contents(db: Session, user_id: int):
+    # Get all cart items for the user
+    cart_items = get_cart_rows(db, user_id)
+
+    # Calculate the total price by summing up the 'total_price' column for all items
+    total_price = sum(item.total_price for item in cart_items)
+
+    # Return cart items along with the total price
+    return {
+        "cart_items": [item._asdict() for item in cart_items],
+        "total_price": total_price if total_price else 0.0  # Return 0 if no items are in the cart
+    }
+
+
+# Function to run a read in its own session (on a worker thread), so independent reads can run concurrently
+def run_with_session(make_session, read, *args):
+    db = make_session()
+    try:
+        return read(db, *args)
+    finally:
+        db.close()
+
+
+# Start the background tasks with the app
+@app.on_event("startup")
+async def start_background_tasks():
+    replica_router.start_health_checks()
+    asyncio.create_task(run_cart_sweeper())
+    asyncio.create_task(run_partition_maintenance(engine))
+    # The co-occurrence index scans order history, so build it without delaying startup
+    asyncio.create_task(asyncio.to_thread(build_co_occurrence_index))
+    # Keep this process' caches in step with writes made by other workers and nodes
+    invalidation_bus.subscribe(refresh_menu_snapshot)
+    invalidation_bus.subscribe(count_published_order)
+    invalidation_bus.subscribe(evict_order_reports)
+    invalidation_bus.subscribe(publish_order_event)
+    invalidation_bus.start_listener()
+
+
+# Write out any buffered append-only records before the worker exits
+@app.on_event("shutdown")
+def drain_group_commit_writer():
+    group_commit_writer.drain()
+
+
 # Signup Endpoint (Public Route)
 @app.post("/register", summary="Create Account", response_model=TokenSignupResponse, tags=["Authentication"])
 def create_user_api(user: UserCreate, db: Session = Depends(get_db)):
@@ -67,18 +172,60 @@ def get_me(current_user: User = Depends(get_current_user)):
     Get the current user's information.
     Requires a valid JWT token for authentication.
     """
+    return user_profile_response(current_user)
+
+
+# Start Screen Data in One Request (Admin & User)
+@app.get("/bootstrap", summary="Profile, Categories, Menu and Cart in One Request", response_model=BootstrapResponse,
+         tags=["user"])
+async def bootstrap(current_user: User = Depends(get_current_user)):
+    """
+    Everything the app start screen needs: the same data as /me, /category,
+    /menu/All and /cart (cart is null for admins), fetched concurrently.
+    """
+    # The cart stays on the primary so items are visible right after they are added/ordered
+    cart = None
+    if menu_snapshot:
+        # Embed the categories and menu JSON already rendered in the snapshot file instead of decoding them
+        if current_user.role != "admin":
+            cart = await asyncio.to_thread(run_with_session, SessionLocal, cart_contents, current_user.user_id)
+        body = b"".join((
+            b'{"profile":', UserInformation(**user_profile_response(current_user)).model_dump_json().encode(),
+            b',"categories":', bytes(menu_snapshot.categories_json()),
+            b',"menu":', bytes(menu_snapshot.menu_json()),
+            b',"cart":', CartResponse.model_validate(cart).model_dump_json().encode() if cart else b"null",
+            b"}"
+        ))
+        return Response(body, media_type="application/json")
+
+    reads = [
+        asyncio.to_thread(run_with_session, replica_router.get_session, category_list),
+        asyncio.to_thread(run_with_session, replica_router.get_session, full_menu_list)
+    ]
+    if current_user.role != "admin":
+        reads.append(asyncio.to_thread(run_with_session, SessionLocal, cart_contents, current_user.user_id))
+    categories, menu, *cart = await asyncio.gather(*reads)
+
     return {
-        "fullname": current_user.fullname,
-        "user_name": current_user.user_name,
-        "email": current_user.email,
-        "phone_no": current_user.phone_no,
-        "address": current_user.address,
-        "post_code": current_user.post_code,
-        "role": current_user.role,
-        "created_date": current_user.created_date
+        "profile": user_profile_response(current_user),
+        "categories": categories,
+        "menu": menu,
+        "cart": cart[0] if cart else None
     }
 
 
+# Order History of Current User
+@app.get("/me/orders", summary="Current User Order History", response_model=OrderHistoryResponse, tags=["user"])
+def get_my_orders(limit: int = Query(20, ge=1, le=100), cursor: str | None = None,
+                  current_user: User = Depends(get_current_user),
+                  db: Session = Depends(get_db)):
+    """
+    Get the current user's orders, newest first.
+    Pass the returned next_cursor to fetch the next page.
+    """
+    return get_user_orders(db, current_user.user_id, limit, cursor)
+
+
 # Update Current User (Admins cannot update users)
 @app.put("/me/update", summary="Update Current User Info", response_model=UserProfileUpdateResponse,
          tags=["user"])
@@ -108,20 +255,17 @@ def create_food_category(category: CreateCategoryRequest,
 # Get All Category(Admin & User)
 @app.get("/category", summary="Get all category Item (Admin & User) ", response_model=List[CreateCategory],
          tags=["menu"])
-def get_category(db: Session = Depends(get_db)):
+def get_category(db: Session = Depends(get_read_db)):
 
     """
 
         Get All the current Food Menu.
 
     """
-    category = db.query(Category).all()
-    # Return the image URL as a string (no markdown or HTML)
-    return [{
-        "category_id": food.category_id,
-        "name": food.name,
-        "image_url": f"http://localhost:8000/{food.image_url}"  # Just a plain URL
-    } for food in category]
+    if menu_snapshot:
+        # Already rendered in the shared snapshot file
+        return Response(bytes(menu_snapshot.categories_json()), media_type="application/json")
+    return category_list(db)
 
 
 @app.delete("/category/{id}", summary="Delete category Item (Admin)", tags=["menu"])
@@ -167,6 +311,26 @@ def create_restaurant_food_menu(menu: CreateFoodMenu,
     }
 
 
+# Bulk update Food Menu Items (declared before /menu/{id} so "bulk" is not taken as an id)
+@app.put("/menu/bulk", summary="Bulk Update Menu Items (Admin)", response_model=BulkFoodMenuUpdateResponse,
+         tags=["menu"])
+def bulk_update_food_menu_api(bulk_update: BulkFoodMenuUpdate,
+                              current_user: User = Depends(get_current_user),
+                              db: Session = Depends(get_db)):
+    """
+    Change price, quantity and/or is_active of many items at once,
+    selected either by food_ids or by category_id.
+    """
+    if current_user.role == "user":
+        raise HTTPException(status_code=403, detail="User are not authorized to update Menu")
+
+    updated = bulk_update_food_menu(db, bulk_update)
+    return {
+        "message": f"{len(updated)} food menu items updated successfully",
+        "updated": [food_menu_response(food) for food in updated]
+    }
+
+
 # update Food  Menu Item
 @app.put("/menu/{id}", summary="Update Menu Item (Admin)", tags=["menu"])
 def update_food_menu(food_id: int, food_update: FoodMenuUpdate,
@@ -197,50 +361,69 @@ def delete_food_menu(food_id: int,
     }
 
 
+# Get Menu Changes (declared before /menu/{Category} so "changes" is not taken as a category)
+@app.get("/menu/changes", summary="Get Menu Changes Since a Version (Admin & User)",
+         response_model=MenuChangesResponse, tags=["menu"])
+def get_menu_changes_api(since: int = 0, db: Session = Depends(get_read_db)):
+    """
+    Get only the menu and category changes after the given version.
+    since=0 (first sync) or a client too far behind gets a full snapshot (full=true).
+    """
+    changes = get_menu_changes(db, since)
+    return {
+        **changes,
+        "menu": [food_menu_response(food) for food in changes["menu"]],
+        "categories": [category_response(category) for category in changes["categories"]]
+    }
+
+
 # Get Menu Item
 @app.get("/menu/{Category}", summary="Get all Menu Item by Category (Admin & User) ",
          response_model=List[GetFoodMenuResponse], tags=["menu"])
-def get_restaurant_menu(category_name: str = "All", db: Session = Depends(get_db)):
+def get_restaurant_menu(category_name: str = "All", db: Session = Depends(get_read_db)):
     """
     Get all the current Food Menu according category_name
     """
+    if menu_snapshot:
+        # Send the JSON already rendered in the shared snapshot file (rebuilt whenever the menu changes)
+        menu_json = menu_snapshot.menu_json(None if category_name == "All" else category_name)
+        if menu_json is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return Response(bytes(menu_json), media_type="application/json")
+
     if category_name == "All":
         # If category_name is 'All', get all the menu items
-        menu = db.query(FoodMenu).all()
-    else:
-        # Otherwise, filter by category_name
-        category = db.query(Category).filter(Category.name == category_name).first()
-        if not category:
-            raise HTTPException(status_code=404, detail="Category not found")
+        return full_menu_list(db)
+
+    # Otherwise, filter by category_name
+    category = db.query(Category.category_id).filter(Category.name == category_name).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
 
-        menu = db.query(FoodMenu).filter(FoodMenu.category_name == category_name).all()
+    menu = get_menu_rows(db, category_name)
 
     # Return the food menu data with image URLs
-    return [{
-        "food_id": food.food_id,
-        "food_name": food.food_name,
-        "quantity": food.quantity,
-        "description": food.description,
-        "category_id": food.category_id,
-        "category_name": food.category_name,
-        "price": food.price,
-        "food_image_url": f"http://localhost:8000/{food.food_image_url}"  # Just a plain URL
-    } for food in menu]
+    return [food_menu_response(food) for food in menu]
 
 
 # Add Food Item In Cart(User Only)
 @app.post("/select_food/{id}", summary="Add Food Item In Cart (User)", tags=["cart"])
 def add_item_to_cart(cart_data: AddToCart,
+                     idempotency_key: str | None = Header(None),
                      db: Session = Depends(get_db),
                      current_user: User = Depends(get_current_user)):
     if current_user.role == "admin":
         raise HTTPException(status_code=403, detail="Only User Can Add Item")
 
-    cart_item = add_to_cart(db, current_user.user_id, cart_data)
-    return {
-        "message": f"{cart_item.food_name} added to cart successfully",
-        "total_price": cart_item.total_price
-    }
+    def add_item():
+        cart_item = add_to_cart(db, current_user.user_id, cart_data)
+        return {
+            "message": f"{cart_item.food_name} added to cart successfully",
+            "total_price": cart_item.total_price
+        }
+
+    # Retries with the same Idempotency-Key get the first response instead of a second cart row
+    return run_idempotent(idempotency_key, current_user.user_id, "select_food", cart_data.model_dump(), add_item)
 
 
 # Get Cart Item
@@ -250,26 +433,104 @@ def view_cart(db: Session = Depends(get_db),
     if current_user.role == "admin":
         raise HTTPException(status_code=403, detail="Only User Can see Item")
 
-    # Get all cart items for the current user
-    cart_items = db.query(Cart).filter(Cart.user_id == current_user.user_id).all()
+    # Cart stays on the primary (get_db) so items are visible right after they are added/ordered
+    return cart_contents(db, current_user.user_id)
 
-    # Calculate the total price by summing up the 'total_price' column for all items
-    total_price = db.query(func.sum(Cart.total_price)).filter(Cart.user_id == current_user.user_id).scalar()
 
-    # Return cart items along with the total price
-    return {
-        "cart_items": cart_items,
-        "total_price": total_price if total_price else 0.0  # Return 0 if no items are in the cart
-    }
+# Abandoned Cart Sweeper Metrics
+@app.get("/admin/cart-sweeper", summary="Abandoned Cart Sweeper Metrics (Admin)", tags=["cart"])
+def get_cart_sweeper_metrics(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view sweeper metrics")
+
+    return cart_sweeper_metrics
+
+
+# Download a Request Profile (folded stacks, for speedscope or flamegraph.pl)
+@app.get("/admin/profiles/{profile_id}", summary="Download Request Profile (Admin)", tags=["Admin"])
+def get_request_profile(profile_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can download profiles")
+    if not profile_id.isalnum():
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+
+    path = os.path.join(PROFILE_DIR, f"request-{profile_id}.folded")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    with open(path, encoding="utf-8") as profile_file:
+        return PlainTextResponse(profile_file.read())
+
+
+# Frequently Bought Together (User Only)
+@app.get("/cart/recommendations", summary="Frequently Bought Together with Cart Items (User)",
+         response_model=List[GetFoodMenuResponse], tags=["cart"])
+def get_cart_recommendations_api(k: int = Query(5, ge=1, le=20),
+                                 db: Session = Depends(get_db),
+                                 current_user: User = Depends(get_current_user)):
+    """
+    Get the k menu items most often ordered together with what is in the cart.
+    """
+    if current_user.role == "admin":
+        raise HTTPException(status_code=403, detail="Only User Can see Recommendations")
+
+    return [food_menu_response(food) for food in get_cart_recommendations(db, current_user.user_id, k)]
 
 
 @app.post("/order", summary="Place Order (User)", tags=["order"])
-def place_order_api(db: Session = Depends(get_db),
+def place_order_api(idempotency_key: str | None = Header(None),
+                    db: Session = Depends(get_db),
                     current_user: User = Depends(get_current_user)):
     if current_user.role == "admin":
         raise HTTPException(status_code=403, detail="Only users can place orders.")
 
-    return place_order(db, current_user.user_id)
+    # Retries with the same Idempotency-Key get the original order instead of a duplicate
+    return run_idempotent(idempotency_key, current_user.user_id, "order", {},
+                          lambda: place_order(db, current_user.user_id))
+
+
+# Live Order Stream for the kitchen/admin screen (Server-Sent Events)
+@app.get("/orders/stream", summary="Stream New Orders (Admin)", tags=["order"])
+async def stream_orders(request: Request,
+                        last_event_id: str | None = Header(None),
+                        token: dict = Depends(get_token_payload)):
+    """
+    Push every newly placed order as an SSE "order" event.
+    Reconnect with the Last-Event-ID header to resume; a "reset" event means
+    the missed orders are gone and the screen should reload /orders/{date}.
+    Authenticated from the token alone, so the stream does not hold a database session open.
+    """
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can stream orders.")
+
+    try:
+        resume_from = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_from = None
+    subscriber, missed = order_hub.subscribe(resume_from)
+
+    async def event_stream():
+        try:
+            if missed is None:
+                yield "event: reset\ndata: {}\n\n"
+            for event_id, data in missed or []:
+                yield f"id: {event_id}\nevent: order\ndata: {data}\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # Client fell too far behind; it reconnects and resumes from Last-Event-ID
+                    break
+                event_id, data = event
+                yield f"id: {event_id}\nevent: order\ndata: {data}\n\n"
+        finally:
+            order_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 # @app.get("/admin/orders-by-date", tags=["Admin"])
@@ -287,8 +548,14 @@ def place_order_api(db: Session = Depends(get_db),
 #
 #     return {"orders": orders}
 @app.get("/orders/{date}", summary="Get All Orders According to Date (Admin)  ", tags=["order"])
-def get_orders(start_date: str, end_date: str, db: Session = Depends(get_db)):
-
+def get_orders(start_date: str, end_date: str, include_archived: bool = False,
+               limit: int = Query(100, ge=1, le=1000), cursor: int | None = None,
+               db: Session = Depends(get_read_db)):
+    """
+    Get one page of orders in the date range, ordered by order number.
+    Pass the returned next_cursor to fetch the next page.
+    Days that are over are served from a cache, only today is read from the database.
+    """
     try:
         # Convert date strings to datetime objects
         start_date = datetime.strptime(start_date, "%Y-%m-%d")
@@ -299,12 +566,14 @@ def get_orders(start_date: str, end_date: str, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Start date must be before end date.")
 
         # Call the function from crud.py to get orders in the date range
-        grouped_orders = get_orders_by_date(db, start_date, end_date)
+        page = get_orders_by_date(db, start_date, end_date, include_archived, limit, cursor)
 
         # Prepare response
         response_data = {
-            "no_of_orders": len(grouped_orders),
-            "orders": list(grouped_orders.values())
+            "no_of_orders": len(page["orders"]),
+            "orders": page["orders"],
+            "page_total_price": page["page_total_price"],
+            "next_cursor": page["next_cursor"]
         }
         return response_data
 
@@ -312,17 +581,62 @@ def get_orders(start_date: str, end_date: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
 
+# Kitchen Batching Plan (Admin)
+@app.get("/admin/kitchen/plan", summary="Kitchen Cooking Plan (Admin)", tags=["order"])
+def get_kitchen_plan_api(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Pending order items grouped into batches of the same dish (ordered within
+    KITCHEN_BATCH_WINDOW_MINUTES, at most KITCHEN_MAX_BATCH portions), in the
+    order they should be cooked: least slack before the promised time first.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view the kitchen plan")
+
+    batches = get_kitchen_plan(db)
+    return {
+        "window_minutes": KITCHEN_BATCH_WINDOW_MINUTES,
+        "max_batch": KITCHEN_MAX_BATCH,
+        "no_of_batches": len(batches),
+        "batches": batches
+    }
+
+
+# Mark Kitchen Batches as Cooked (Admin)
+@app.post("/admin/kitchen/complete", summary="Mark Cooked Items Done (Admin)", tags=["order"])
+def complete_kitchen_batch(batch: KitchenBatchComplete, db: Session = Depends(get_db),
+                           current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can update the kitchen queue")
+
+    return complete_order_items(db, batch.item_ids)
+
+
+# Closed-Day Order Report Cache Metrics
+@app.get("/admin/order-report-cache", summary="Order Report Cache Metrics (Admin)", tags=["order"])
+def get_order_report_cache_metrics(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view order report cache metrics")
+
+    return order_report_cache.metrics()
+
+
 @app.post("/feedback", summary="Create Feedback (User)", tags=["order"])
 def create_feedback_endpoint(feedback: CreateFeedback,
                              db: Session = Depends(get_db),
                              current_user: User = Depends(get_current_user)):
-
+    """
+    Store the current user's feedback. Durability depends on FEEDBACK_WRITE_MODE:
+    "sync" (default) commits it before responding; "group" batches it with other
+    feedback but still responds only after the batch is committed; "async" responds
+    once it is queued, so feedback still queued is lost if the process is killed
+    (it is flushed on a clean shutdown) and the response carries no id.
+    """
     # Check if the user is authorized to give feedback (you can modify role validation as needed)
     if current_user.role == "admin":
         raise HTTPException(status_code=403, detail="Admin cannot submit feedback")
 
     # Call the CRUD function to store feedback
-    new_feedback = create_feedback(db, current_user.user_id, current_user.fullname, feedback)
+    new_feedback = submit_feedback(db, current_user.user_id, current_user.fullname, feedback)
 
     return {
         "message": "Feedback submitted successfully",
@@ -331,7 +645,7 @@ def create_feedback_endpoint(feedback: CreateFeedback,
 
 
 @app.get("/feedbacks", summary="Get All Feedbacks (Admin)", tags=["order"])
-def get_all_feedback_endpoint(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_all_feedback_endpoint(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view all feedback")
 
@@ -0,0 +1,183 @@
+import asyncio
+import atexit
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from starlette.middleware.base import BaseHTTPMiddleware
+from dotenv import load_dotenv
+from auth import decode_access_token
+
+# Load environment variables
+load_dotenv()
+
+# Let admins profile a single request with the "X-Profile: 1" header or "?profile=1" (0 disables)
+PROFILE_ON_DEMAND = os.getenv("PROFILE_ON_DEMAND", "0") == "1"
+# Fraction of all requests profiled in the background and aggregated per route (0 disables)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Aggregated background profiles are written this often
+PROFILE_FLUSH_SECONDS = float(os.getenv("PROFILE_FLUSH_SECONDS", "60"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# Profiles are folded stacks ("frame;frame;frame count" lines): open them with speedscope or flamegraph.pl
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# The profile of the request a piece of code is running for (copied into tasks and worker threads)
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.stacks = Counter()  # folded stack -> samples
+
+
+# Function to find the contextvars Context a thread is running in from its frames:
+# asyncio runs every task step through Handle._run, anyio runs threadpool calls through WorkerThread.run
+def frame_context(frame):
+    if frame.f_code.co_name == "_run":
+        handle = frame.f_locals.get("self")
+        if isinstance(handle, asyncio.Handle):
+            return handle._context
+    elif frame.f_code.co_name == "run":
+        context = frame.f_locals.get("context")
+        if isinstance(context, contextvars.Context):
+            return context
+    return None
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    One thread that samples the stacks of every thread while profiles are active.
+    A sample is counted for a profile only when the thread is running inside that request's context,
+    so concurrent requests do not end up in each other's profiles.
+    """
+
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        self._active = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, profile: RequestProfile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile: RequestProfile):
+        with self._lock:
+            self._active.discard(profile)
+
+    def _sample(self, profiles):
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            names, profile = [], None
+            while frame is not None:
+                names.append(frame_name(frame))
+                if profile is None:
+                    context = frame_context(frame)
+                    if context is not None:
+                        profile = context.get(current_profile)
+                frame = frame.f_back
+            if profile in profiles:
+                profile.stacks[";".join(reversed(names))] += 1
+
+    def _run(self):
+        while True:
+            with self._lock:
+                profiles = set(self._active)
+            if not profiles:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            self._sample(profiles)
+            time.sleep(self.interval)
+
+
+def write_folded(path: str, stacks: Counter):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as profile_file:
+        for stack, count in stacks.most_common():
+            profile_file.write(f"{stack} {count}\n")
+
+
+class ProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Runs admin-requested requests (and a random sample of all requests) under the stack sampler.
+    Only added to the app when PROFILE_ON_DEMAND or PROFILE_SAMPLE_RATE enable it.
+    """
+
+    def __init__(self, app, on_demand: bool = PROFILE_ON_DEMAND, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 directory: str = PROFILE_DIR):
+        super().__init__(app)
+        self.on_demand = on_demand
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.sampler = StackSampler(PROFILE_INTERVAL_MS)
+        self._aggregate = Counter()
+        self._aggregate_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    def _requested(self, request):
+        if not self.on_demand:
+            return False
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        if flag not in ("1", "true"):
+            return False
+        payload = decode_access_token(request.headers.get("authorization"))
+        return bool(payload) and payload.get("role") == "admin"
+
+    # Function to write the aggregated background profile and start a new one
+    def flush(self):
+        with self._aggregate_lock:
+            stacks, self._aggregate = self._aggregate, Counter()
+            self._last_flush = time.monotonic()
+        if stacks:
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            write_folded(os.path.join(self.directory, f"background-{timestamp}-{os.getpid()}.folded"), stacks)
+
+    async def dispatch(self, request, call_next):
+        requested = self._requested(request)
+        if not requested and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return await call_next(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        self.sampler.start(profile)
+        try:
+            response = await call_next(request)
+        finally:
+            self.sampler.stop(profile)
+            current_profile.reset(token)
+
+        # Label with the route template so samples of e.g. /menu/{Category} aggregate together
+        route = request.scope.get("route")
+        label = f"{request.method} {route.path if route else request.url.path}"
+        stacks = Counter({f"{label};{stack}": count for stack, count in profile.stacks.items()})
+
+        if requested:
+            profile_id = uuid.uuid4().hex[:12]
+            write_folded(os.path.join(self.directory, f"request-{profile_id}.folded"), stacks)
+            response.headers["X-Profile-Id"] = profile_id
+            response.headers["X-Profile-Samples"] = str(sum(stacks.values()))
+        else:
+            with self._aggregate_lock:
+                self._aggregate.update(stacks)
+            if time.monotonic() - self._last_flush >= PROFILE_FLUSH_SECONDS:
+                self.flush()
+        return response
@@ -0,0 +1,194 @@
+import ipaddress
+import logging
+import os
+import threading
+import time
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from dotenv import load_dotenv
+from auth import decode_access_token
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Token bucket settings (requests per second and burst size)
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "10"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "20"))
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "20"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "40"))
+# Optional shared backend so limits hold across gunicorn workers
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+# Reverse proxies (comma separated IPs or CIDRs) whose X-Forwarded-For header is trusted for the client IP
+TRUSTED_PROXIES = [ipaddress.ip_network(proxy.strip(), strict=False)
+                   for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()]
+
+# Maximum concurrent requests per route class in this worker
+IN_FLIGHT_LIMITS = {
+    "read": int(os.getenv("MAX_IN_FLIGHT_READ", "200")),
+    "write": int(os.getenv("MAX_IN_FLIGHT_WRITE", "50")),
+    "bcrypt": int(os.getenv("MAX_IN_FLIGHT_BCRYPT", "4")),
+}
+
+# Paths that hash or verify passwords are far more expensive than anything else
+BCRYPT_PATHS = {"/login", "/register"}
+
+# Static image mounts are cheap and a single page load fetches many of them, so they are not limited
+EXEMPT_PATH_PREFIXES = ("/menu_images/", "/category_images/")
+
+
+class InMemoryBackend:
+    """Token buckets kept in this process only"""
+
+    # Buckets that have refilled to full are dropped this often (a missing bucket starts full anyway)
+    SWEEP_INTERVAL = 60
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+
+    def _sweep(self, now: float):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_sweep = now + self.SWEEP_INTERVAL
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Consume one token; return 0 if allowed, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            tokens, updated_at, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+
+class RedisBackend:
+    """Token buckets shared by every worker through Redis"""
+
+    # Refill and take atomically on the server; returns the wait time in milliseconds
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) / 1000 * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = math.ceil((1 - tokens) / rate * 1000)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return wait
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio  # Only needed when a shared backend is configured
+
+        # Async client: the middleware runs on the event loop and must not block it on the round trip
+        self._client = redis.asyncio.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        wait_ms = await self._script(keys=[f"rate_limit:{key}"], args=[rate, burst, int(time.time() * 1000)])
+        return int(wait_ms) / 1000
+
+
+def get_rate_limit_backend():
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBackend(RATE_LIMIT_REDIS_URL)
+    return InMemoryBackend()
+
+
+# Function to check if an address belongs to a trusted proxy
+def is_trusted_proxy(address: str):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+# Function to get the client IP: the peer address, or the X-Forwarded-For entry added by the first
+# untrusted hop when the peer is a trusted proxy (entries further left can be set by the client)
+def get_client_ip(request):
+    client_ip = request.client.host if request.client else "unknown"
+    if not is_trusted_proxy(client_ip):
+        return client_ip
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        client_ip = hop
+        if not is_trusted_proxy(hop):
+            break
+    return client_ip
+
+
+# Function to classify a request for the in-flight caps
+def get_route_class(method: str, path: str):
+    if path in BCRYPT_PATHS:
+        return "bcrypt"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+
+def too_many_requests(retry_after: float):
+    return JSONResponse(status_code=429, content={"detail": "Too many requests"},
+                        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+
+
+class AdmissionControlMiddleware(BaseHTTPMiddleware):
+    """Per-user/per-IP token buckets plus a per-route-class in-flight cap"""
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        self.backend = backend or get_rate_limit_backend()
+        # Only touched from the event loop, so plain ints are enough
+        self.in_flight = {route_class: 0 for route_class in IN_FLIGHT_LIMITS}
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take a token, letting the request through if the backend is unavailable"""
+        try:
+            return await self.backend.take(key, rate, burst)
+        except Exception:
+            logger.warning("Rate limit backend failed, allowing request", exc_info=True)
+            return 0
+
+    async def dispatch(self, request, call_next):
+        if request.url.path.startswith(EXEMPT_PATH_PREFIXES):
+            return await call_next(request)
+
+        client_ip = get_client_ip(request)
+        retry_after = await self.take(f"ip:{client_ip}", RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST)
+        if retry_after:
+            return too_many_requests(retry_after)
+
+        payload = decode_access_token(request.headers.get("authorization"))
+        user_name = payload.get("sub") if payload else None
+        if user_name:
+            retry_after = await self.take(f"user:{user_name}", RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST)
+            if retry_after:
+                return too_many_requests(retry_after)
+
+        route_class = get_route_class(request.method, request.url.path)
+        if self.in_flight[route_class] >= IN_FLIGHT_LIMITS[route_class]:
+            return JSONResponse(status_code=503, content={"detail": "Server is busy, please retry"},
+                                headers={"Retry-After": "1"})
+
+        self.in_flight[route_class] += 1
+        try:
+            return await call_next(request)
+        finally:
+            self.in_flight[route_class] -= 1
@@ -0,0 +1,59 @@
+"""Archive closed months of orders to compressed JSONL files.
+
+Usage:
+    python -m scripts.archive_orders                 # everything older than ORDER_RETENTION_MONTHS
+    python -m scripts.archive_orders --before 2025-01
+    python -m scripts.archive_orders --keep-detached  # detach partitions without dropping them
+"""
+import argparse
+import os
+from datetime import date, datetime
+from sqlalchemy import func
+from data.database import SessionLocal
+from data.model.models import Orders
+from data.archive import archive_month, archive_path
+from data.partitions import month_start, months_between
+
+ORDER_RETENTION_MONTHS = int(os.getenv("ORDER_RETENTION_MONTHS", "12"))
+
+
+# Function to get the month start that is a number of months before a date
+def months_ago(value, months: int):
+    month_index = value.year * 12 + value.month - 1 - months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed months of orders")
+    parser.add_argument("--before", help="archive every month before this one (YYYY-MM)")
+    parser.add_argument("--keep-detached", action="store_true",
+                        help="keep detached Postgres partitions instead of dropping them")
+    args = parser.parse_args()
+
+    if args.before:
+        before = month_start(datetime.strptime(args.before, "%Y-%m"))
+    else:
+        before = months_ago(datetime.now(), ORDER_RETENTION_MONTHS)
+
+    # The current month is never closed, whatever --before says
+    before = min(before, month_start(datetime.now()))
+
+    db = SessionLocal()
+    try:
+        first_order = db.query(func.min(Orders.order_date)).scalar()
+        if not first_order or month_start(first_order) >= before:
+            print("Nothing to archive.")
+            return
+
+        for month in months_between(first_order, before):
+            if month >= before:
+                break
+            count = archive_month(db, month, args.keep_detached)
+            if count:
+                print(f"{month:%Y-%m}: archived {count} orders to {archive_path(month)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Replay recorded traffic against a local instance and compare latencies.
+
+Reads the JSONL written by TrafficRecorderMiddleware, re-issues every request at the
+original pace (or faster with --speed) and prints per-route latency against the
+recorded timings, so regressions show up with real access patterns.
+
+Usage:
+    python -m scripts.replay_traffic traffic/requests.jsonl --base-url http://localhost:8000 \\
+        --user customer1:password123 --admin admin:secret --speed 10
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def login(base_url: str, credentials: str):
+    user_name, password = credentials.split(":", 1)
+    request = urllib.request.Request(f"{base_url}/login", method="POST",
+                                     data=json.dumps({"user_name": user_name, "password": password}).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())["access_token"]
+
+
+def send(base_url: str, record: dict, token: str | None):
+    url = f"{base_url}{record['path']}" + (f"?{record['query']}" if record["query"] else "")
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(record["body"]).encode() if record["body"] is not None else None
+    request = urllib.request.Request(url, method=record["method"], data=data, headers=headers)
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, (time.perf_counter() - started) * 1000
+
+
+def percentile(values, fraction: float):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded traffic and report latency deltas")
+    parser.add_argument("file", help="JSONL file written by the traffic recorder")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="pace multiplier, 0 replays as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--user", help="user_name:password used for requests recorded with the user role")
+    parser.add_argument("--admin", help="user_name:password used for requests recorded with the admin role")
+    args = parser.parse_args()
+
+    tokens = {}
+    if args.user:
+        tokens["user"] = login(args.base_url, args.user)
+    if args.admin:
+        tokens["admin"] = login(args.base_url, args.admin)
+
+    with open(args.file, encoding="utf-8") as traffic:
+        records = [json.loads(line) for line in traffic if line.strip()]
+    records.sort(key=lambda record: record["timestamp"])
+
+    # Requests that carried masked fields (passwords etc.) or a role we have no token for are skipped
+    replayable, skipped = [], 0
+    for record in records:
+        masked = isinstance(record["body"], dict) and "***" in record["body"].values()
+        if masked or (record["role"] and record["role"] not in tokens):
+            skipped += 1
+        else:
+            replayable.append(record)
+    if not replayable:
+        print(f"Nothing to replay ({skipped} requests skipped)")
+        return
+
+    results = defaultdict(lambda: {"recorded": [], "replayed": [], "status_changed": 0})
+    lock = threading.Lock()
+
+    def replay(record):
+        status, duration_ms = send(args.base_url, record, tokens.get(record["role"]))
+        with lock:
+            route = results[f"{record['method']} {record['route']}"]
+            route["recorded"].append(record["duration_ms"])
+            route["replayed"].append(duration_ms)
+            if status != record["status"]:
+                route["status_changed"] += 1
+
+    first = datetime.fromisoformat(replayable[0]["timestamp"])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for record in replayable:
+            if args.speed > 0:
+                offset = (datetime.fromisoformat(record["timestamp"]) - first).total_seconds() / args.speed
+                delay = offset - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(replay, record)
+
+    print(f"Replayed {len(replayable)} requests in {time.perf_counter() - started:.1f}s ({skipped} skipped)")
+    print(f"{'route':<40} {'count':>6} {'rec p50':>9} {'rep p50':>9} {'rec p95':>9} {'rep p95':>9} "
+          f"{'delta':>8} {'status!=':>8}")
+    for route, result in sorted(results.items()):
+        recorded_p50 = statistics.median(result["recorded"])
+        replayed_p50 = statistics.median(result["replayed"])
+        delta = (replayed_p50 - recorded_p50) / recorded_p50 * 100 if recorded_p50 else 0
+        print(f"{route:<40} {len(result['recorded']):>6} {recorded_p50:>8.1f}ms {replayed_p50:>8.1f}ms "
+              f"{percentile(result['recorded'], 0.95):>8.1f}ms {percentile(result['replayed'], 0.95):>8.1f}ms "
+              f"{delta:>+7.0f}% {result['status_changed']:>8}")
+
+
+if __name__ == "__main__":
+    main()
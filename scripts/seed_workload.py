@@ -0,0 +1,266 @@
+"""Fill the database with a realistic synthetic workload for performance testing.
+
+Generates users, categories, food menu items, orders with their items (spread over
+the day with lunch and dinner peaks), open carts and feedback. The same --seed always
+produces the same data. Rows are written in batches with multi-row INSERTs, or with
+COPY on Postgres.
+
+Usage:
+    python -m scripts.seed_workload --users 10000 --items 3000 --orders 1000000 --seed 42
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, text
+from data.database import Base, SessionLocal, engine
+from data.model.models import User, Category, FoodMenu, Cart, Orders, OrderItem, Feedback
+from data.curd import hash_password
+from data.menu_snapshot import write_menu_snapshot
+from data.invalidation import invalidation_bus
+from data.partitions import create_month_partition, is_partitioned, months_between, PARTITIONED_TABLES
+
+# Relative order volume per hour of the day: quiet mornings, lunch and dinner peaks
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 0, 1, 2, 4, 4, 5, 10, 18, 16, 8, 5, 5, 9, 16, 20, 17, 10, 5, 2]
+# Relative volume per weekday, Monday first
+WEEKDAY_WEIGHTS = [8, 8, 9, 10, 14, 16, 12]
+ITEMS_PER_ORDER_WEIGHTS = [35, 30, 18, 10, 7]  # 1 to 5 distinct items
+CATEGORY_NAMES = ["pizza", "burger", "beverages", "desserts", "pasta", "salads", "wraps", "sides",
+                  "breakfast", "kids", "vegan", "seafood", "grill", "soups", "specials"]
+FEEDBACK_MESSAGES = ["Great food", "Delivery was late", "Loved the pizza", "Too salty", "Will order again",
+                     "Cold on arrival", "Friendly staff", "Portion too small", "Best burger in town", None]
+
+
+# Function to write rows in one statement per batch, COPY on Postgres
+def bulk_insert(conn, table, columns, rows):
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([[row[column] for column in columns] for row in rows])
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.close()
+    else:
+        conn.execute(table.insert(), rows)
+
+
+def next_id(conn, column):
+    return (conn.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+# Function to move Postgres serial sequences past the explicitly inserted ids
+def reset_sequences(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    for table, column in [("users", "user_id"), ("categories", "category_id"), ("food_menu", "food_id"),
+                          ("orders", "order_no")]:
+        conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                          f"COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false)"))
+
+
+class WorkloadGenerator:
+    def __init__(self, seed: int, days: int, end: datetime):
+        self.rng = random.Random(seed)
+        self.end = end
+        self.start = self.end - timedelta(days=days)
+        # Nothing is generated in the future when the history ends today
+        self.latest = min(self.end, datetime.now(timezone.utc).replace(tzinfo=None))
+        self.days = [self.start.date() + timedelta(days=offset) for offset in range(days)]
+        self.day_weights = [WEEKDAY_WEIGHTS[day.weekday()] for day in self.days]
+
+    def order_time(self):
+        day = self.rng.choices(self.days, self.day_weights)[0]
+        hour = self.rng.choices(range(24), HOUR_WEIGHTS)[0]
+        order_time = datetime(day.year, day.month, day.day, hour) + timedelta(seconds=self.rng.randrange(3600))
+        if order_time > self.latest:
+            # Later today: place it in the part of the day that has already passed instead
+            day_start = datetime(day.year, day.month, day.day)
+            order_time = day_start + (self.latest - day_start) * self.rng.random()
+        return order_time
+
+    def users(self, first_id: int, count: int, password_hash: str):
+        return [{
+            "user_id": first_id + index,
+            "fullname": f"Customer {first_id + index}",
+            "user_name": f"customer{first_id + index}",
+            "password": password_hash,
+            "address": f"{self.rng.randint(1, 300)} Main Street",
+            "email": f"customer{first_id + index}@example.com",
+            "phone_no": f"{self.rng.randrange(10 ** 9, 10 ** 10)}",
+            "created_date": self.start - timedelta(days=self.rng.randrange(365)),
+            "post_code": self.rng.randrange(10000, 99999),
+            "role": "user"
+        } for index in range(count)]
+
+    def categories(self, first_id: int, count: int):
+        return [{
+            "category_id": first_id + index,
+            "name": f"{CATEGORY_NAMES[index % len(CATEGORY_NAMES)]} {first_id + index}",
+            "image_url": f"category_images/{CATEGORY_NAMES[index % len(CATEGORY_NAMES)]}.jpg",
+            "created_date": self.start
+        } for index in range(count)]
+
+    def food_items(self, first_id: int, count: int, categories, admin_id):
+        items = []
+        for index in range(count):
+            category = self.rng.choice(categories)
+            items.append({
+                "food_id": first_id + index,
+                "food_name": f"{category['name']} item {first_id + index}",
+                "description": f"House special number {first_id + index}",
+                "quantity": self.rng.randint(50, 100000),
+                "category_id": category["category_id"],
+                "category_name": category["name"],
+                "is_active": "Yes" if self.rng.random() < 0.95 else "No",
+                "created_date": self.start,
+                "price": round(self.rng.uniform(1.5, 35), 2),
+                "user_id": admin_id,
+                "food_image_url": f"menu_images/item_{first_id + index}.jpg",
+                "prep_minutes": 5 + index % 16
+            })
+        return items
+
+    def orders(self, first_order_no: int, count: int, user_ids, foods, popularity):
+        """Yield (order, items) pairs; popular dishes are ordered far more often (Zipf-like)"""
+        for order_no in range(first_order_no, first_order_no + count):
+            order_date = self.order_time()
+            item_count = self.rng.choices(range(1, 6), ITEMS_PER_ORDER_WEIGHTS)[0]
+            chosen = {food["food_id"]: food for food in self.rng.choices(foods, cum_weights=popularity, k=item_count)}
+            items = [{
+                "order_no": order_no,
+                "food_id": food["food_id"],
+                "food_name": food["food_name"],
+                "quantity": self.rng.choices([1, 2, 3, 4], [70, 20, 7, 3])[0],
+                "order_date": order_date,
+                "status": "Done"
+            } for food in chosen.values()]
+            total_price = round(sum(item["quantity"] * chosen[item["food_id"]]["price"] for item in items), 2)
+            yield {
+                "order_no": order_no,
+                "user_id": self.rng.choice(user_ids),
+                "status": "Completed",
+                "order_date": order_date,
+                "total_price": total_price
+            }, items
+
+    def carts(self, user_ids, foods, count: int):
+        rows = []
+        for user_id in self.rng.sample(user_ids, min(count, len(user_ids))):
+            for food in self.rng.sample(foods, min(self.rng.randint(1, 4), len(foods))):
+                quantity = self.rng.randint(1, 3)
+                rows.append({
+                    "food_id": food["food_id"],
+                    "food_name": food["food_name"],
+                    "quantity": quantity,
+                    "user_id": user_id,
+                    "price": food["price"],
+                    "total_price": round(quantity * food["price"], 2),
+                    "created_date": self.latest - timedelta(hours=self.rng.uniform(0, 96))
+                })
+        return rows
+
+    def feedback(self, user_ids, count: int):
+        return [{
+            "user_id": user_id,
+            "name": f"Customer {user_id}",
+            "message": self.rng.choice(FEEDBACK_MESSAGES),
+            "created_date": self.order_time(),
+            "rating": float(self.rng.choices([1, 2, 3, 4, 5], [5, 7, 15, 33, 40])[0])
+        } for user_id in (self.rng.choices(user_ids, k=count) if user_ids else [])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database with a synthetic workload")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365, help="spread orders over this many past days")
+    parser.add_argument("--carts", type=int, default=500, help="users with an open cart")
+    parser.add_argument("--feedback", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", help="last day of generated history (YYYY-MM-DD), default today; "
+                                           "fix it to get identical data on different days")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--password", default="password123", help="password of every generated user")
+    args = parser.parse_args()
+    if args.items and not args.categories:
+        parser.error("--items needs at least one category")
+    if args.orders and not (args.users and args.items):
+        parser.error("--orders needs at least one user and one menu item")
+
+    Base.metadata.create_all(bind=engine)
+    if args.end_date:
+        end = datetime.strptime(args.end_date, "%Y-%m-%d") + timedelta(days=1)
+    else:
+        end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None) \
+            + timedelta(days=1)
+    generator = WorkloadGenerator(args.seed, args.days, end)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        admin_id = conn.execute(text("SELECT MIN(user_id) FROM users WHERE role = 'admin'")).scalar()
+
+        # bcrypt is slow on purpose, so every generated user shares one hash
+        users = generator.users(next_id(conn, User.user_id), args.users, hash_password(args.password))
+        bulk_insert(conn, User.__table__, list(users[0]) if users else [], users)
+        user_ids = [user["user_id"] for user in users]
+
+        categories = generator.categories(next_id(conn, Category.category_id), args.categories)
+        bulk_insert(conn, Category.__table__, list(categories[0]) if categories else [], categories)
+
+        foods = generator.food_items(next_id(conn, FoodMenu.food_id), args.items, categories, admin_id)
+        bulk_insert(conn, FoodMenu.__table__, list(foods[0]) if foods else [], foods)
+        print(f"{len(users)} users, {len(categories)} categories, {len(foods)} menu items")
+
+        if is_partitioned(conn, "orders"):
+            for month in months_between(generator.start, generator.end):
+                for table in PARTITIONED_TABLES:
+                    create_month_partition(conn, table, month)
+
+    # Orders are committed batch by batch so millions of rows never sit in memory
+    popularity, total = [], 0.0
+    for rank in range(len(foods)):
+        total += 1 / (rank + 1)
+        popularity.append(total)
+    generator.rng.shuffle(foods)
+
+    with engine.connect() as conn:
+        first_order_no = next_id(conn, Orders.order_no)
+    order_batch, item_batch, written = [], [], 0
+    for order, items in generator.orders(first_order_no, args.orders, user_ids, foods, popularity):
+        order_batch.append(order)
+        item_batch.extend(items)
+        if len(order_batch) >= args.batch_size:
+            with engine.begin() as conn:
+                bulk_insert(conn, Orders.__table__, list(order_batch[0]), order_batch)
+                bulk_insert(conn, OrderItem.__table__, list(item_batch[0]), item_batch)
+            written += len(order_batch)
+            order_batch, item_batch = [], []
+            print(f"  {written}/{args.orders} orders ({time.perf_counter() - started:.1f}s)")
+    with engine.begin() as conn:
+        if order_batch:
+            bulk_insert(conn, Orders.__table__, list(order_batch[0]), order_batch)
+            bulk_insert(conn, OrderItem.__table__, list(item_batch[0]), item_batch)
+
+        carts = generator.carts(user_ids, foods, args.carts)
+        bulk_insert(conn, Cart.__table__, list(carts[0]) if carts else [], carts)
+        feedback = generator.feedback(user_ids, args.feedback)
+        bulk_insert(conn, Feedback.__table__, list(feedback[0]) if feedback else [], feedback)
+        reset_sequences(conn)
+
+    with SessionLocal() as db:
+        write_menu_snapshot(db)  # No-op unless MENU_SNAPSHOT_PATH is set
+        # Running app processes have cached the old data (menu, closed-day order reports): refresh everything
+        invalidation_bus.publish(db, "*", None)
+
+    print(f"{args.orders} orders, {len(carts)} cart lines, {len(feedback)} feedback entries "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,11 +21,14 @@ def custom_openapi(app):
     }
 
     # Apply authentication to protected routes only
-    protected_routes = ["/me", "/me/update",
+    protected_routes = ["/me", "/me/update", "/me/orders",
                         "/menu/add", "/menu", "/select_food/{id}",
                         "/cart", "/order", "/feedback", "/menu/{Category}",
                         "/feedbacks", "/category", "/category/{id}",
-                        "/menu/{id}", "/orders/{date}",]  # Add other protected routes here if needed
+                        "/menu/{id}", "/orders/{date}", "/orders/stream",
+                        "/admin/cart-sweeper", "/admin/order-report-cache", "/admin/profiles/{profile_id}", "/menu/bulk",
+                        "/cart/recommendations", "/admin/kitchen/plan", "/admin/kitchen/complete",
+                        "/bootstrap",]  # Add other protected routes here if needed
     for path, methods in openapi_schema["paths"].items():
         for method in methods.values():
             if path in protected_routes:
@@ -0,0 +1,75 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from starlette.middleware.base import BaseHTTPMiddleware
+from dotenv import load_dotenv
+from auth import decode_access_token
+
+# Load environment variables
+load_dotenv()
+
+# Fraction of requests recorded (0 disables the recorder)
+TRAFFIC_RECORD_SAMPLE_RATE = float(os.getenv("TRAFFIC_RECORD_SAMPLE_RATE", "0"))
+# JSONL file the sampled requests are appended to (replay with scripts/replay_traffic.py)
+TRAFFIC_RECORD_PATH = os.getenv("TRAFFIC_RECORD_PATH", "traffic/requests.jsonl")
+
+# Body fields that are never written to disk
+SENSITIVE_FIELDS = {"password", "access_token", "token", "email", "phone_no", "address"}
+
+
+# Function to mask sensitive fields of a JSON request body
+def sanitize_body(body: bytes):
+    if not body:
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        return {key: "***" if key in SENSITIVE_FIELDS else value for key, value in data.items()}
+    return data
+
+
+class TrafficRecorderMiddleware(BaseHTTPMiddleware):
+    """Appends a sample of real requests (sanitised) with their timing to a JSONL file"""
+
+    def __init__(self, app, sample_rate: float = TRAFFIC_RECORD_SAMPLE_RATE, path: str = TRAFFIC_RECORD_PATH):
+        super().__init__(app)
+        self.sample_rate = sample_rate
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _write(self, record: dict):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+            self._file.write(json.dumps(record, default=str) + "\n")
+
+    async def dispatch(self, request, call_next):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return await call_next(request)
+
+        body = await request.body()
+        started = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        payload = decode_access_token(request.headers.get("authorization"))
+        route = request.scope.get("route")
+        self._write({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "path": request.url.path,
+            "route": route.path if route else request.url.path,
+            "query": request.url.query,
+            "body": sanitize_body(body),
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 3),
+            "role": payload.get("role") if payload else None
+        })
+        return response